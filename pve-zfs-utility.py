@@ -4,20 +4,30 @@ import sys
 import os
 import subprocess
 import re
-import glob
 from pathlib import Path
 import shutil
 import tempfile
 from datetime import datetime
-import math
 import argparse
 import json
 import traceback # Added for perform_ram_check
+import functools
+import errno
+import threading
+import concurrent.futures
+import hashlib
+import io
+import itertools
+import fcntl
+import selectors
+import collections
 
 # --- Default Configuration ---
 DEFAULT_ZFS_POOL_PATH = "rpool/data"
 DEFAULT_PVE_STORAGE = "local-zfs"
 RAM_THRESHOLD_PERCENT = 90
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB') # format_bytes units, one per 1024 step
+MB_SHIFT = 20 # MB <-> bytes: value << MB_SHIFT / value >> MB_SHIFT
 DEFAULT_EXPORT_META_SUFFIX = ".meta.json"
 DEFAULT_EXPORT_DATA_SUFFIX = ".zfs.stream"
 DEFAULT_EXPORT_CONFIG_SUFFIX = ".conf"
@@ -25,15 +35,35 @@ DEFAULT_EXPORT_CONFIG_SUFFIX = ".conf"
 DEFAULT_EXPORT_DATA_SUFFIX_GZIP = ".zfs.stream.gz"
 DEFAULT_EXPORT_DATA_SUFFIX_ZSTD = ".zfs.stream.zst"
 DEFAULT_EXPORT_DATA_SUFFIX_PIGZ = ".zfs.stream.gz" # Same as gzip
+# 'zfs send' flags for exports: -L large blocks, -e embedded data, -c keep on-disk compressed blocks
+DEFAULT_ZFS_SEND_FLAGS = ["-L", "-e", "-c"]
+
+# --- Pipelines ---
+PIPE_BUFFER_SIZE = 1 << 20 # Kernel capacity requested for pipes between pipeline steps (default 64 KiB)
+F_SETPIPE_SZ = getattr(fcntl, 'F_SETPIPE_SZ', 1031) # Exposed by the fcntl module only from Python 3.10
+# mbuffer between 'zfs send'/'zfs receive' and the other steps, per stream (0 disables)
+DEFAULT_MBUFFER_SIZE = "1G"
+MBUFFER_BLOCK_SIZE = "128k"
+# Written stream files are dropped from the page cache in windows of this size while the export runs
+OUTPUT_CACHE_DROP_WINDOW = 64 << 20
+# Seconds between plain progress lines of pipelines that run without 'pv' (--no-pv or no terminal)
+PROGRESS_REPORT_INTERVAL = 30
 
 # --- Compression Tools ---
 # Define command names for easier checking and execution
 COMPRESSION_TOOLS = {
     "gzip": {"compress": ["gzip", "-c"], "decompress": ["gunzip", "-c"], "suffix": DEFAULT_EXPORT_DATA_SUFFIX_GZIP},
     "pigz": {"compress": ["pigz", "-c"], "decompress": ["unpigz", "-c"], "suffix": DEFAULT_EXPORT_DATA_SUFFIX_PIGZ},
-    "zstd": {"compress": ["zstd", "-T0", "-c"], "decompress": ["unzstd", "-c"], "suffix": DEFAULT_EXPORT_DATA_SUFFIX_ZSTD},
+    "zstd": {"compress": ["zstd", "-T0", "-3", "-c"], "decompress": ["zstd", "-d", "-c"], "suffix": DEFAULT_EXPORT_DATA_SUFFIX_ZSTD},
     "none": {"compress": None, "decompress": None, "suffix": DEFAULT_EXPORT_DATA_SUFFIX}
 }
+# Multi-threaded default; falls back to gzip if zstd is not installed and --compress was not given
+DEFAULT_COMPRESSION_METHOD = "zstd"
+DEFAULT_COMPRESSION_FALLBACK = "gzip"
+DEFAULT_ZSTD_LEVEL = 3 # Negative values select zstd's '--fast=N' levels
+ZSTD_LONG_WINDOW_LOG = 27 # '--long' window (128 MiB); streams stay decodable by zstd without extra flags
+# ZFS 'compressratio' up to which a compressed dataset counts as incompressible (encrypted guest disks, media, archives)
+INCOMPRESSIBLE_COMPRESSRATIO = 1.05
 
 
 # --- Colors ---
@@ -45,14 +75,39 @@ COLORS = {
     'BLUE': '\033[94m',
     'NC': '\033[0m'  # No Color
 }
+# Only emit ANSI escape codes for interactive terminals (not for cron jobs, pipes or log files), and honor NO_COLOR
+COLOR_ENABLED = sys.stdout.isatty() and not os.environ.get('NO_COLOR')
+if not COLOR_ENABLED:
+    COLORS = {name: '' for name in COLORS} # Keeps alignment math based on len(COLORS[...]) correct
+
+# Serializes multi-line console output from concurrent per-disk workers
+PRINT_LOCK = threading.Lock()
+
+# --- Precompiled Patterns ---
+# Numbered config keys, by key base (the key without its trailing number): matched with one rstrip and a set lookup
+CONFIG_KEY_DIGITS = '0123456789'
+VM_DISK_KEY_BASES = frozenset({'scsi', 'ide', 'sata', 'virtio'}) # Regular VM disks, preferred as snapshot reference
+VM_STORAGE_KEY_BASES = VM_DISK_KEY_BASES | {'efidisk', 'tpmstate'}
+LXC_STORAGE_KEY_BASES = frozenset({'mp'}) # Plus the unnumbered 'rootfs'
+# Characters replaced by '_' when a snapshot suffix becomes part of an export directory name
+SNAPSHOT_SUFFIX_UNSAFE_REGEX = re.compile(r'[^a-zA-Z0-9_\-.]')
+# Volume part of a disk line value: 'storage:volume,options' (e.g. local-zfs:vm-100-disk-0,size=32G)
+STORAGE_VOLUME_REGEX = re.compile(r'([^:]+):([^,]+)(.*)')
+# Instance name lines and the first snapshot section header ('[snapname]') of a config file
+INSTANCE_NAME_REGEX = re.compile(r'^(name|hostname):[ \t]*(.*?)[ \t]*$', re.MULTILINE)
+SNAPSHOT_SECTION_REGEX = re.compile(r'^\[', re.MULTILINE)
+# Column separator of the 'qm list --full' text table (names may contain single spaces)
+QM_LIST_COLUMN_SPLIT_REGEX = re.compile(r'\s{2,}')
+# Leading number of a memory size without a known unit suffix (e.g. '2048.5' of '2048.5X')
+SIZE_NUMBER_REGEX = re.compile(r'(\d+(\.\d+)?)')
 
 # --- Helper Functions ---
 
 def color_text(text, color_name):
-    """Colors the text for console output."""
-    color = COLORS.get(color_name.upper(), COLORS['NC'])
-    nc = COLORS['NC']
-    return f"{color}{text}{nc}"
+    """Colors the text for console output (returned unchanged if stdout is not a TTY or NO_COLOR is set)."""
+    if not COLOR_ENABLED: return text
+    color = COLORS.get(color_name) or COLORS.get(color_name.upper(), COLORS['NC']) # Callers pass upper case names
+    return f"{color}{text}{COLORS['NC']}"
 
 def print_info(text):
     """Prints an informational message."""
@@ -66,18 +121,39 @@ def print_warning(text):
     """Prints a warning message."""
     print(color_text(text, "YELLOW"))
 
+def print_block(lines):
+    """Prints several lines with a single write, without interleaving output of other per-disk workers."""
+    with PRINT_LOCK:
+        sys.stdout.write('\n'.join(lines) + '\n')
+
 def print_error(text, exit_code=None):
     """Prints an error message and optionally exits the script."""
     print(color_text(text, "RED"), file=sys.stderr)
     if exit_code is not None:
         sys.exit(exit_code)
 
+@functools.lru_cache(maxsize=64)
+def which_tool(name):
+    """Returns the full path of a command-line tool in PATH, or None. Cached, PATH is only searched once per tool."""
+    return shutil.which(name)
+
 def is_tool(name):
     """Checks if a command-line tool is available in PATH."""
-    return shutil.which(name) is not None
+    return which_tool(name) is not None
+
+@functools.lru_cache(maxsize=None)
+def zstd_supports_long():
+    """Checks once whether the installed zstd supports long distance matching ('--long', zstd >= 1.3.2)."""
+    success, output, _ = run_command(['zstd', '--version'], check=False, capture_output=True, suppress_stderr=True, allow_fail=True)
+    match = re.search(r'v(\d+)\.(\d+)\.(\d+)', output) if success else None
+    return bool(match) and tuple(int(part) for part in match.groups()) >= (1, 3, 2)
 
-def check_compression_tools(method):
-    """Checks if the required compression/decompression tools for a method are available."""
+def check_compression_tools(method, threads=None, zstd_level=None):
+    """
+    Checks if the required compression/decompression tools for a method are available.
+    threads limits the compressor's worker threads (pigz '-p N', zstd '-T N'); None uses all cores.
+    zstd_level replaces the default zstd level and enables '--long' where supported (export only).
+    """
     tool_info = COMPRESSION_TOOLS.get(method) # Get tool_info first
 
     if not tool_info: # Handle invalid method early
@@ -87,6 +163,30 @@ def check_compression_tools(method):
     if method == "none":
         return True, True, tool_info
 
+    if method == "gzip" and is_tool("pigz") and is_tool("unpigz"):
+        # pigz writes/reads standard gzip streams, so use the parallel implementation transparently
+        tool_info = dict(tool_info, compress=COMPRESSION_TOOLS["pigz"]["compress"], decompress=COMPRESSION_TOOLS["pigz"]["decompress"])
+    elif method == "pigz":
+        # ... and the other way round: without pigz (e.g. restoring on another host) the gzip tools handle pigz streams
+        if not is_tool("pigz") and is_tool("gzip"):
+            tool_info = dict(tool_info, compress=COMPRESSION_TOOLS["gzip"]["compress"])
+        if not is_tool("unpigz") and is_tool("gunzip"):
+            tool_info = dict(tool_info, decompress=COMPRESSION_TOOLS["gzip"]["decompress"])
+
+    if threads and tool_info.get("compress"):
+        compress_cmd = tool_info["compress"]
+        if compress_cmd[0] == "pigz":
+            tool_info = dict(tool_info, compress=[compress_cmd[0], "-p", str(threads)] + compress_cmd[1:])
+        elif compress_cmd[0] == "zstd":
+            tool_info = dict(tool_info, compress=[f"-T{threads}" if arg.startswith("-T") else arg for arg in compress_cmd])
+
+    if zstd_level is not None and method == "zstd" and is_tool("zstd"):
+        level_arg = f"-{zstd_level}" if zstd_level > 0 else f"--fast={-zstd_level}"
+        compress_cmd = [level_arg if arg == f"-{DEFAULT_ZSTD_LEVEL}" else arg for arg in tool_info["compress"]]
+        if zstd_supports_long():
+            compress_cmd.insert(-1, f"--long={ZSTD_LONG_WINDOW_LOG}") # Before the final '-c'
+        tool_info = dict(tool_info, compress=compress_cmd)
+
     compress_cmd_name = tool_info["compress"][0] if tool_info.get("compress") else None
     decompress_cmd_name = tool_info["decompress"][0] if tool_info.get("decompress") else None
 
@@ -100,10 +200,32 @@ def check_compression_tools(method):
 
     return compress_ok, decompress_ok, tool_info
 
-def run_command(cmd_list, check=True, capture_output=True, text=True, error_msg=None, suppress_stderr=False, input_data=None, allow_fail=False):
+def copy_file_fast(src, dst):
+    """
+    Copies a file with os.sendfile() (in-kernel copy) and preserves metadata like shutil.copy2.
+    Falls back to shutil.copy2 if sendfile is not supported for the given files.
+    """
+    try:
+        with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+            remaining = os.fstat(f_src.fileno()).st_size
+            offset = 0
+            while remaining > 0:
+                sent = os.sendfile(f_dst.fileno(), f_src.fileno(), offset, remaining)
+                if sent == 0: break # Source shrank while copying
+                offset += sent
+                remaining -= sent
+        shutil.copystat(src, dst)
+    except (OSError, AttributeError) as e:
+        if isinstance(e, OSError) and e.errno not in (errno.EINVAL, errno.ENOSYS, errno.EOPNOTSUPP):
+            raise
+        shutil.copy2(src, dst)
+
+def run_command(cmd_list, check=True, capture_output=True, text=True, error_msg=None, suppress_stderr=False, input_data=None, allow_fail=False, binary=False):
     """
     Executes a shell command and returns the output or checks for success.
+    With binary=True the output is returned as bytes (no text decoding/newline translation by subprocess).
     """
+    if binary: text = False
     stdin_setting = subprocess.PIPE if input_data is not None else None
 
     if capture_output:
@@ -116,16 +238,18 @@ def run_command(cmd_list, check=True, capture_output=True, text=True, error_msg=
     try:
         process = subprocess.run(
             cmd_list,
+            executable=which_tool(cmd_list[0]), # Absolute path: no PATH walk per exec, and lets CPython use posix_spawn/vfork
             check=check and not allow_fail,
             text=text,
             stdout=stdout_setting,
             stderr=stderr_setting,
             input=input_data,
             stdin=stdin_setting,
-            errors='replace'
+            errors='replace' if text else None
         )
-        stdout_res = process.stdout.strip() if stdout_setting == subprocess.PIPE and process.stdout else ""
-        stderr_res = process.stderr.strip() if stderr_setting == subprocess.PIPE and process.stderr else ""
+        empty = "" if text else b""
+        stdout_res = process.stdout.strip() if stdout_setting == subprocess.PIPE and process.stdout else empty
+        stderr_res = process.stderr.strip() if stderr_setting == subprocess.PIPE and process.stderr else empty
 
         if allow_fail:
             return (process.returncode == 0, stdout_res, stderr_res)
@@ -158,9 +282,162 @@ def run_command(cmd_list, check=True, capture_output=True, text=True, error_msg=
         print_error(f"{msg}: {e}", exit_code=1)
 
 
-def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
+def advise_file(handle, advice_name):
+    """Applies posix_fadvise (e.g. 'POSIX_FADV_SEQUENTIAL') to a whole open file. No-op where unsupported."""
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, 'posix_fadvise'): return
+    try: os.posix_fadvise(handle.fileno(), 0, 0, advice)
+    except OSError: pass # Purely advisory (e.g. not supported by the filesystem)
+
+
+def copy_stream_with_hash(src, dst, hash_obj, errors, copied=None, chunk_size=1024 * 1024):
+    """
+    Copies a binary stream to a file handle while updating hash_obj. Errors are appended to 'errors'.
+    If copied (a one-element list) is given, copied[0] holds the running byte count for progress reports.
+    Reads into one reusable buffer straight from the pipe instead of allocating a new bytes object per chunk.
+    Pages the kernel has already written back are dropped from the page cache as the copy proceeds (one
+    OUTPUT_CACHE_DROP_WINDOW behind), so a large export does not evict the host's cache until its end.
+    """
+    try:
+        buffer = bytearray(chunk_size)
+        view = memoryview(buffer)
+        read_into = getattr(src, 'raw', src).readinto # Unbuffered: the pipe fills our buffer directly
+        drop_cache = getattr(os, 'POSIX_FADV_DONTNEED', None) if hasattr(os, 'posix_fadvise') else None
+        written = dropped = 0
+        while True:
+            n = read_into(buffer)
+            if not n: break
+            hash_obj.update(view[:n])
+            dst.write(view[:n])
+            written += n
+            if copied is not None: copied[0] = written
+            if drop_cache is not None and written - dropped >= 2 * OUTPUT_CACHE_DROP_WINDOW:
+                # Lag one window behind: DONTNEED skips pages that are still dirty, so only written-back data is dropped
+                try: os.posix_fadvise(dst.fileno(), dropped, written - OUTPUT_CACHE_DROP_WINDOW - dropped, drop_cache)
+                except OSError: drop_cache = None # Purely advisory; stop trying on filesystems without support
+                dropped = written - OUTPUT_CACHE_DROP_WINDOW
+    except Exception as e:
+        errors.append(e)
+        try: src.close() # Unblock the writer (it gets SIGPIPE) instead of leaving it hanging
+        except Exception: pass
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Returns the hex SHA-256 digest of a file."""
+    hash_obj = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            hash_obj.update(chunk)
+    return hash_obj.hexdigest()
+
+
+def get_mbuffer_command(buffer_size):
+    """
+    Returns the mbuffer pipeline step for the given memory size (e.g. '1G'), or None if buffering
+    is disabled ('0') or mbuffer is not installed.
+    """
+    if not buffer_size or buffer_size == "0" or not is_tool('mbuffer'):
+        return None
+    return ['mbuffer', '-q', '-s', MBUFFER_BLOCK_SIZE, '-m', buffer_size]
+
+@functools.lru_cache(maxsize=None)
+def get_pipe_buffer_size():
+    """
+    Returns the pipe size to request: PIPE_BUFFER_SIZE, capped at /proc/sys/fs/pipe-max-size unless running
+    as root (CAP_SYS_RESOURCE may exceed it). Cached, the limit is read once per run.
+    """
+    if os.geteuid() == 0: return PIPE_BUFFER_SIZE
+    try:
+        with open('/proc/sys/fs/pipe-max-size') as f:
+            return min(PIPE_BUFFER_SIZE, int(f.read()))
+    except (OSError, ValueError):
+        return PIPE_BUFFER_SIZE
+
+def enlarge_pipe(pipe_file):
+    """
+    Raises the kernel buffer of a pipe to PIPE_BUFFER_SIZE, so producer and consumer of a pipeline step
+    need fewer context switches and absorb short stalls of each other. Capped at the system limit for
+    non-root users, so a lowered pipe-max-size still gives the largest allowed pipe instead of the default.
+    """
+    try: fcntl.fcntl(pipe_file.fileno(), F_SETPIPE_SZ, get_pipe_buffer_size())
+    except (OSError, ValueError): pass
+
+def drain_pipes(pipes):
+    """
+    Reads all pipes of a {pipe_file: bytearray or None} dict until EOF, multiplexed in the calling thread
+    with selectors. Data is appended to the pipe's bytearray (None discards it); pipes are closed at EOF.
+    """
+    selector = selectors.DefaultSelector()
+    for pipe_file, buffer in pipes.items():
+        selector.register(pipe_file, selectors.EVENT_READ, buffer)
+    try:
+        while selector.get_map():
+            for key, _ in selector.select():
+                try: chunk = os.read(key.fd, 65536)
+                except OSError: chunk = b""
+                if not chunk:
+                    selector.unregister(key.fileobj)
+                    key.fileobj.close()
+                elif key.data is not None:
+                    key.data.extend(chunk)
+    finally:
+        selector.close()
+
+def use_progress_bar(disabled=False):
+    """Returns True if 'pv' should draw progress bars: installed, not disabled with --no-pv and stderr is a terminal."""
+    return not disabled and sys.stderr.isatty() and is_tool('pv')
+
+def proc_io_counter(pid, io_field):
+    """
+    Returns a function reading the io_field (b'wchar' or b'rchar') of /proc/<pid>/io of one pipeline step,
+    or None once the step has exited (or /proc/<pid>/io is not readable for this user).
+    Used where no byte passes through this script (clone, restore), so no 'pv' is needed to count them.
+    """
+    io_path = f"/proc/{pid}/io"
+    field_prefix = io_field + b':'
+    def read_counter():
+        try:
+            with open(io_path, 'rb') as f: io_stats = f.read()
+        except OSError:
+            return None
+        return next((int(line[len(field_prefix):]) for line in io_stats.split(b'\n') if line.startswith(field_prefix)), None)
+    return read_counter
+
+def report_pipeline_progress(read_done_bytes, label, total_bytes, stop_event):
+    """
+    Prints a progress line every PROGRESS_REPORT_INTERVAL seconds until stop_event is set or
+    read_done_bytes() returns None. total_bytes is the expected total (None if unknown).
+    """
+    last_bytes = 0
+    while not stop_event.wait(PROGRESS_REPORT_INTERVAL):
+        done = read_done_bytes()
+        if done is None: return
+        rate = (done - last_bytes) // PROGRESS_REPORT_INTERVAL
+        last_bytes = done
+        total_str = f" of ~{format_bytes(total_bytes)} ({min(done * 100 // total_bytes, 100)}%)" if total_bytes else ""
+        print_info(f"    {label}: {format_bytes(done)}{total_str}, {format_bytes(rate)}/s")
+
+def cancel_pipeline_on_event(cancel_event, pipeline_done, process_info):
+    """Terminates all steps of a running pipeline once cancel_event is set (until pipeline_done is set)."""
+    while not pipeline_done.is_set():
+        if cancel_event.wait(0.5):
+            for info in process_info:
+                try: info['proc'].terminate()
+                except Exception: pass # Already exited
+            return
+
+
+def run_pipeline(commands, step_names=None, pv_options=None, output_file=None, input_file=None, output_hash=None,
+                 progress_label=None, progress_size=None, cancel_event=None):
     """
-    Executes a command pipeline (e.g., cmd1 | pv | compressor | cmd2 > file).
+    Executes a command pipeline (e.g., cmd1 < file | pv | compressor | cmd2 > file).
+    If input_file is given, it is opened and used directly as stdin of the first command.
+    If output_hash (a hashlib object) is given together with output_file, the final output is
+    copied to the file by a helper thread which updates the hash on the fly (no extra read pass).
+    If progress_label is given and the pipeline has no 'pv' step, plain progress lines are printed
+    instead (progress_size is the expected total). With output_hash the count is the bytes the hash thread
+    wrote to output_file; otherwise it is read from /proc (bytes read from input_file or written by the first step).
+    If cancel_event (a threading.Event) is set while the pipeline runs, all its steps are terminated and it fails.
     """
     processes = []
     num_commands = len(commands)
@@ -172,21 +449,31 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
 
     process_info = []
     final_output_handle = None
+    input_handle = None
+    hash_thread = None
+    hash_errors = []
+    copied_bytes = [0] # Running count of the hash thread, read by the progress reporter
 
     try:
         last_process_stdout = None
 
+        if input_file:
+            input_handle = open(input_file, 'rb', buffering=0) # Raw fd for the child, no Python-side read buffer
+            advise_file(input_handle, 'POSIX_FADV_SEQUENTIAL') # Larger readahead; inherited by the reading child
+            last_process_stdout = input_handle # Becomes stdin of the first command, closed after handoff
+
         if output_file:
             output_file.parent.mkdir(parents=True, exist_ok=True)
             final_output_handle = open(output_file, 'wb')
+            advise_file(final_output_handle, 'POSIX_FADV_SEQUENTIAL')
 
         for i, cmd in enumerate(commands):
             stdin_source = last_process_stdout
             is_last_command = (i == num_commands - 1)
-            stdout_dest = final_output_handle if is_last_command and final_output_handle else subprocess.PIPE
+            stdout_dest = final_output_handle if is_last_command and final_output_handle and output_hash is None else subprocess.PIPE
 
             is_pv_command = (cmd[0] == 'pv')
-            stderr_dest = None if is_pv_command or cmd[0] in ['gzip', 'gunzip', 'pigz', 'unpigz', 'zstd', 'unzstd'] else subprocess.PIPE
+            stderr_dest = None if is_pv_command or cmd[0] in ['gzip', 'gunzip', 'pigz', 'unpigz', 'zstd', 'unzstd', 'mbuffer'] else subprocess.PIPE
 
             current_cmd = cmd[:]
             if is_pv_command and pv_options:
@@ -194,11 +481,14 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
 
             proc = subprocess.Popen(
                 current_cmd,
+                executable=which_tool(current_cmd[0]),
                 stdin=stdin_source,
                 stdout=stdout_dest,
                 stderr=stderr_dest,
-                bufsize=8192
+                bufsize=0, # Pipe ends are only read via readinto/os.read or handed to the next step; no Python-side buffer
+                close_fds=True
             )
+            if stdout_dest == subprocess.PIPE: enlarge_pipe(proc.stdout) # Shared with the next step's stdin
             processes.append(proc)
             process_info.append({'proc': proc, 'command': current_cmd})
 
@@ -211,66 +501,80 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
                     print_warning(f"  Error closing stdin pipe for {' '.join(current_cmd)}: {pipe_err}")
 
 
-            if not (is_last_command and final_output_handle):
+            if is_last_command and final_output_handle and output_hash is not None:
+                hash_thread = threading.Thread(target=copy_stream_with_hash, args=(proc.stdout, final_output_handle, output_hash, hash_errors, copied_bytes), daemon=True)
+                hash_thread.start()
+            elif not (is_last_command and final_output_handle):
                  last_process_stdout = proc.stdout
 
+        # Drain piped stderr (and an unconsumed final stdout) of all steps concurrently in one thread, so a
+        # chatty step can never block on a full pipe while we wait for another step to finish.
+        stderr_buffers = {}
+        drained_pipes = {}
+        for idx, info in enumerate(process_info):
+            if info['proc'].stderr:
+                stderr_buffers[idx] = drained_pipes[info['proc'].stderr] = bytearray()
+        if process_info and process_info[-1]['proc'].stdout and not hash_thread:
+            drained_pipes[process_info[-1]['proc'].stdout] = None # Not used by callers, only discarded
+        drain_thread = None
+        if drained_pipes:
+            drain_thread = threading.Thread(target=drain_pipes, args=(drained_pipes,), daemon=True)
+            drain_thread.start()
+
+        progress_stop = None
+        if progress_label and process_info and not any(cmd[0] == 'pv' for cmd in commands):
+            progress_stop = threading.Event()
+            if hash_thread: # Every output byte already passes through the hash thread; use its count
+                read_done_bytes = lambda: copied_bytes[0] if hash_thread.is_alive() else None
+            else:
+                read_done_bytes = proc_io_counter(process_info[0]['proc'].pid, b'rchar' if input_file else b'wchar')
+            threading.Thread(
+                target=report_pipeline_progress,
+                args=(read_done_bytes, progress_label, progress_size, progress_stop),
+                daemon=True
+            ).start()
+
+        pipeline_done = None
+        if cancel_event is not None and process_info:
+            pipeline_done = threading.Event()
+            threading.Thread(target=cancel_pipeline_on_event, args=(cancel_event, pipeline_done, process_info), daemon=True).start()
+
         return_codes = []
-        stderr_outputs = []
         success = True
         timed_out = False
 
         for idx, info in enumerate(process_info):
             proc = info['proc']
             cmd_str = ' '.join(info['command'])
-            capture_stderr = proc.stderr == subprocess.PIPE
 
             try:
-                stdout_data, stderr_data = proc.communicate(timeout=7200)
-                rc = proc.returncode
-                return_codes.append(rc)
-
-                stderr_content = ""
-                if capture_stderr and stderr_data:
-                    try:
-                        stderr_content = stderr_data.decode('utf-8', errors='replace').strip()
-                    except Exception:
-                        stderr_content = "Could not decode stderr"
-                stderr_outputs.append(stderr_content)
-
-
-                if rc != 0:
-                    if rc == -13: # SIGPIPE
-                         print_warning(f"Pipeline step {step_names[idx]} ('{cmd_str}') exited with SIGPIPE (rc={rc}). Often okay if a later step failed.")
-                    else:
+                if hash_thread and idx == len(process_info) - 1:
+                    hash_thread.join(timeout=7200)
+                    if hash_thread.is_alive(): raise subprocess.TimeoutExpired(info['command'], 7200)
+                    proc.stdout.close()
+                    if hash_errors:
                         success = False
-                        print_error(f"Pipeline failed at {step_names[idx]} '{cmd_str}' (rc={rc})")
-                        if stderr_content:
-                            print_error(f"Stderr:\n{stderr_content}")
+                        print_error(f"Error writing pipeline output to {output_file}: {hash_errors[0]}")
+                return_codes.append(proc.wait(timeout=7200))
             except subprocess.TimeoutExpired:
                 print_error(f"Pipeline timed out at {step_names[idx]} '{cmd_str}'")
                 proc.kill()
-                try:
-                    stdout_data, stderr_data = proc.communicate(timeout=10)
+                try: proc.wait(timeout=10)
                 except Exception: pass
                 success = False
                 timed_out = True
                 return_codes.append(proc.returncode if proc.returncode is not None else -1)
-                stderr_content = "Timeout"
-                if capture_stderr and stderr_data:
-                    try: stderr_content = stderr_data.decode('utf-8', errors='replace').strip()
-                    except Exception: pass
-                stderr_outputs.append(stderr_content)
                 break
-            except Exception as comm_err:
-                print_error(f"Error during communicate() for {step_names[idx]} ('{cmd_str}'): {comm_err}")
+            except Exception as wait_err:
+                print_error(f"Error while waiting for {step_names[idx]} ('{cmd_str}'): {wait_err}")
                 success = False
-                rc = proc.returncode if proc.returncode is not None else -99
-                return_codes.append(rc)
-                stderr_outputs.append(f"Communication Error: {comm_err}")
-
+                return_codes.append(proc.returncode if proc.returncode is not None else -99)
 
+        if progress_stop: progress_stop.set()
+        if pipeline_done: pipeline_done.set()
+        cancelled = cancel_event is not None and cancel_event.is_set()
+        finished_count = len(return_codes)
         while len(return_codes) < num_commands: return_codes.append(None)
-        while len(stderr_outputs) < num_commands: stderr_outputs.append("Not executed or error")
 
         for p_info in process_info:
              try:
@@ -284,19 +588,39 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
              except ProcessLookupError: pass
              except Exception as kill_err:
                   print_warning(f"Error terminating/killing process {' '.join(p_info['command'])}: {kill_err}")
-             finally:
-                 if p_info['proc'].stdin:
-                     try: p_info['proc'].stdin.close()
-                     except Exception: pass
-                 if p_info['proc'].stdout:
-                     try: p_info['proc'].stdout.close()
-                     except Exception: pass
-                 if p_info['proc'].stderr:
-                     try: p_info['proc'].stderr.close()
-                     except Exception: pass
+
+        if drain_thread:
+            drain_thread.join(timeout=10) # All steps have exited; only output still in the pipes is left to read
+
+        for p_info in process_info:
+            for pipe_file in (p_info['proc'].stdin, p_info['proc'].stdout, p_info['proc'].stderr):
+                if pipe_file and pipe_file not in drained_pipes: # The drain thread closes its own pipes
+                    try: pipe_file.close()
+                    except Exception: pass
+
+        # Report failed steps with their stderr, now that it has been read completely
+        if cancelled:
+            success = False
+            print_warning(f"Pipeline ({' | '.join(step_names)}) was cancelled.")
+            finished_count = 0 # Steps were terminated on purpose; their exit codes are not errors of their own
+        for idx in range(finished_count):
+            rc = return_codes[idx]
+            if rc == 0 or (timed_out and idx == finished_count - 1): continue # Timeout already reported
+            cmd_str = ' '.join(process_info[idx]['command'])
+            if rc == -13: # SIGPIPE
+                 print_warning(f"Pipeline step {step_names[idx]} ('{cmd_str}') exited with SIGPIPE (rc={rc}). Often okay if a later step failed.")
+            else:
+                success = False
+                print_error(f"Pipeline failed at {step_names[idx]} '{cmd_str}' (rc={rc})")
+                stderr_content = bytes(stderr_buffers.get(idx, b"")).decode('utf-8', errors='replace').strip()
+                if stderr_content:
+                    print_error(f"Stderr:\n{stderr_content}")
 
         if final_output_handle:
             try:
+                final_output_handle.flush()
+                # Stream files are written once and not read back; don't let them push the VMs' data out of the page cache
+                advise_file(final_output_handle, 'POSIX_FADV_DONTNEED')
                 final_output_handle.close()
             except Exception as close_err:
                  print_warning(f"Error closing output file handle: {close_err}")
@@ -327,6 +651,9 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
         if final_output_handle:
              try: final_output_handle.close()
              except: pass
+        if input_handle:
+            try: input_handle.close()
+            except Exception: pass
         if output_file and output_file.exists():
             try: output_file.unlink()
             except OSError: pass
@@ -339,23 +666,28 @@ def run_pipeline(commands, step_names=None, pv_options=None, output_file=None):
         if final_output_handle:
             try: final_output_handle.close()
             except: pass
+        if input_handle:
+            try: input_handle.close()
+            except Exception: pass
         if output_file and output_file.exists():
             try: output_file.unlink()
             except OSError: pass
         return False
 
 
+@functools.lru_cache(maxsize=256)
 def format_bytes(b):
-    """Formats bytes into a readable size (B, KB, MB, GB, TB)."""
+    """Formats bytes into a readable size (B, KB, MB, GB, TB). Cached; snapshot tables repeat many sizes (e.g. 0 B)."""
     if b is None: return "N/A"
     try:
         b = float(b)
         if b == 0: return "0 B"
-        power = math.floor(math.log(abs(b), 1024))
-        unit = ['B', 'KB', 'MB', 'GB', 'TB', 'PB', 'EB'][max(0, min(power, 6))]
-        val = b / (1024**power)
-        if unit == 'B': return f"{int(val)} {unit}"
-        elif unit in ['KB', 'MB']: return f"{val:.1f} {unit}"
+        # Unit index from the integer bit length (10 bits per unit step) instead of a float logarithm
+        idx = max(0, min((int(abs(b)).bit_length() - 1) // 10, len(SIZE_UNITS) - 1))
+        unit = SIZE_UNITS[idx]
+        val = b / (1 << (10 * idx))
+        if idx == 0: return f"{int(val)} {unit}"
+        elif idx <= 2: return f"{val:.1f} {unit}"
         else: return f"{val:.2f} {unit}"
     except (ValueError, TypeError, OverflowError,):
         return "N/A"
@@ -370,13 +702,38 @@ def parse_size_to_mb(size_str):
     elif size_str.endswith('T'): return int(float(size_str[:-1]) * 1024 * 1024)
     elif size_str.isdigit(): return int(size_str)
     else:
-        match = re.match(r'^(\d+(\.\d+)?)', size_str)
+        match = SIZE_NUMBER_REGEX.match(size_str)
         if match:
             print_warning(f"Unknown/missing unit in '{size_str}', interpreting as MB.")
             return int(float(match.group(1)))
         print_warning(f"Could not parse size '{size_str}', returning 0 MB.")
         return 0
 
+@functools.lru_cache(maxsize=16)
+def load_config_text(path_str, mtime_ns):
+    """Reads a config file. Cached; mtime_ns is part of the key so a changed file is re-read."""
+    with open(path_str, 'r') as f:
+        return f.read()
+
+def read_config_text(conf_path):
+    """Returns the text of a Proxmox configuration file, read at most once per modification."""
+    return load_config_text(str(conf_path), os.stat(conf_path).st_mtime_ns)
+
+@functools.lru_cache(maxsize=16)
+def load_config_sections(path_str, mtime_ns):
+    """
+    Splits a config file once into the lines of the current config and the snapshot sections after it.
+    Returns (active_lines, snapshot_text, snapshot_header_line_numbers). Cached like load_config_text.
+    """
+    lines = io.StringIO(load_config_text(path_str, mtime_ns)).readlines()
+    header_line_numbers = tuple(num for num, line in enumerate(lines) if line.lstrip().startswith('['))
+    first_section = header_line_numbers[0] if header_line_numbers else len(lines)
+    return tuple(lines[:first_section]), ''.join(lines[first_section:]), header_line_numbers
+
+def read_config_sections(conf_path):
+    """Returns the parsed sections of a Proxmox configuration file (see load_config_sections), split once per modification."""
+    return load_config_sections(str(conf_path), os.stat(conf_path).st_mtime_ns)
+
 def get_instance_details(conf_path):
     """Reads ID and name from a Proxmox configuration file."""
     instance_id = Path(conf_path).stem
@@ -385,34 +742,42 @@ def get_instance_details(conf_path):
     config_type = "VM" if 'qemu-server' in conf_path.parts else "LXC"
 
     try:
-        with open(conf_path, 'r') as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith('[') or line.startswith('#'): continue
-
-                if line.startswith('name:'):
-                    name = line.split(':', 1)[1].strip()
-                elif is_lxc and line.startswith('hostname:'):
-                     if name == "no-name/hostname": name = line.split(':', 1)[1].strip()
-                     break
+        config_text = read_config_text(conf_path)
+        # Only the current config counts: scan up to the first snapshot section, with no per-line Python work
+        snapshot_section = SNAPSHOT_SECTION_REGEX.search(config_text)
+        end = snapshot_section.start() if snapshot_section else len(config_text)
+        for match in INSTANCE_NAME_REGEX.finditer(config_text, 0, end):
+            if match.group(1) == 'name' or is_lxc: # VMs use 'name:', LXCs 'hostname:' (a 'name:' line still wins if first)
+                name = match.group(2)
+                break
     except Exception as e:
         print_warning(f"Could not fully read configuration file {conf_path}: {e}")
     return instance_id, name, config_type
 
+def scan_config_files(directory):
+    """Returns the sorted paths of all '*.conf' files in a directory (one scandir, no glob pattern matching)."""
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(entry.path for entry in entries if entry.name.endswith('.conf') and entry.is_file())
+    except OSError:
+        return [] # Directory missing (e.g. no LXC support) behaves like an empty glob
+
 def list_instances():
     """Lists all available VMs and LXC containers."""
     print_info("Available VMs and LXC containers:")
     vms = []
     lxcs = []
-    vm_conf_files = sorted(glob.glob("/etc/pve/qemu-server/*.conf"))
-    lxc_conf_files = sorted(glob.glob("/etc/pve/lxc/*.conf"))
+    vm_conf_files = scan_config_files("/etc/pve/qemu-server")
+    lxc_conf_files = scan_config_files("/etc/pve/lxc")
 
+    # Color codes bound once for the per-instance lines (empty strings if stdout is not a TTY)
+    blue, nc = COLORS['BLUE'], COLORS['NC']
     print(f"  {color_text('VMs', 'YELLOW')}:")
     if vm_conf_files:
         for conf in vm_conf_files:
             vm_id, vm_name, _ = get_instance_details(Path(conf))
             vms.append({'id': vm_id, 'name': vm_name})
-            print(f"    {color_text(vm_id, 'BLUE')} - {vm_name}")
+            print(f"    {blue}{vm_id}{nc} - {vm_name}")
     else:
         print(f"    {color_text('No VMs found.', 'YELLOW')}")
 
@@ -421,7 +786,7 @@ def list_instances():
         for conf in lxc_conf_files:
             lxc_id, lxc_name, _ = get_instance_details(Path(conf))
             lxcs.append({'id': lxc_id, 'name': lxc_name})
-            print(f"    {color_text(lxc_id, 'BLUE')} - {lxc_name}")
+            print(f"    {blue}{lxc_id}{nc} - {lxc_name}")
     else:
         print(f"    {color_text('No LXC containers found.', 'YELLOW')}")
 
@@ -441,12 +806,14 @@ def find_instance_config(instance_id):
 
 def list_snapshots(dataset):
     """Lists ZFS snapshots for a given dataset including their 'written', 'refer', and 'used' properties."""
-    cmd = ['zfs', 'list', '-t', 'snapshot', '-o', 'name,creation,written,refer,used', '-s', 'creation', '-H', '-p', dataset]
-    success, output, stderr = run_command(cmd, check=False, capture_output=True, suppress_stderr=True, allow_fail=True, error_msg=f"Failed to list snapshots for {dataset}")
+    # '-d 1' scopes the listing to the dataset's own snapshots, binary output is decoded once instead of per line
+    cmd = ['zfs', 'list', '-t', 'snapshot', '-d', '1', '-o', 'name,creation,written,refer,used', '-s', 'creation', '-H', '-p', dataset]
+    success, output, stderr = run_command(cmd, check=False, capture_output=True, allow_fail=True, binary=True)
     snapshots = []
+    snapshot_prefix = f"{dataset}@"
     if success and output:
-        for line in output.strip().split('\n'):
-            if line.startswith(f"{dataset}@"):
+        for line in output.decode('utf-8', 'replace').split('\n'):
+            if line.startswith(snapshot_prefix):
                 try:
                     name, creation_ts, written_bytes, refer_bytes, used_bytes = line.split('\t')
                     snapshots.append({
@@ -458,11 +825,12 @@ def list_snapshots(dataset):
                     })
                 except ValueError:
                     print_warning(f"Could not parse snapshot line (expected 5 fields): {line}")
-                    if line.startswith(f"{dataset}@"):
-                         name_part = line.strip().split('\t')[0]
-                         snapshots.append({'name': name_part, 'creation_timestamp': 0, 'written_bytes': 0, 'refer_bytes': 0, 'used_bytes': 0})
-    elif not success and "does not exist" not in stderr:
-         print_warning(f"Could not list snapshots for {dataset}. Stderr: {stderr}")
+                    name_part = line.strip().partition('\t')[0]
+                    snapshots.append({'name': name_part, 'creation_timestamp': 0, 'written_bytes': 0, 'refer_bytes': 0, 'used_bytes': 0})
+    elif not success:
+        stderr = stderr.decode('utf-8', 'replace')
+        if "does not exist" not in stderr:
+            print_warning(f"Could not list snapshots for {dataset}. Stderr: {stderr}")
     return snapshots
 
 
@@ -475,68 +843,196 @@ def get_zfs_property(target, property_name):
     else:
         return None
 
-def get_snapshot_size_estimate(snapshot_name):
-    """Estimates the size of a ZFS snapshot for 'zfs send'."""
-    cmd = ['zfs', 'send', '-nP', snapshot_name]
+def list_zfs_names(targets, zfs_types, recursive=False):
+    """
+    Returns the set of ZFS names of the given types (e.g. 'snapshot', 'filesystem,volume')
+    for the targets using a single 'zfs list' call. Missing targets simply contribute no names.
+    """
+    cmd = ['zfs', 'list', '-H', '-o', 'name', '-t', zfs_types]
+    if recursive: cmd.append('-r')
+    cmd.extend(targets)
+    _, output, _ = run_command(cmd, check=False, capture_output=True, suppress_stderr=True, allow_fail=True, binary=True)
+    return {line for line in output.decode('ascii', 'replace').split('\n') if line} if output else set()
+
+def get_zfs_property_values(targets, property_name):
+    """Returns {name: value} of one ZFS property for several targets using a single 'zfs get' call."""
+    cmd = ['zfs', 'get', '-H', '-p', '-o', 'name,value', property_name] + list(targets)
+    _, output, _ = run_command(cmd, check=False, capture_output=True, suppress_stderr=True, allow_fail=True, binary=True)
+    values = {}
+    for line in (output.decode('ascii', 'replace').split('\n') if output else []):
+        name, _, value = line.partition('\t')
+        if name: values[name] = value
+    return values
+
+def list_snapshot_sizes(datasets, size_property='referenced'):
+    """
+    Returns {snapshot_name: size_bytes} for all snapshots of the given datasets using a single
+    'zfs list' call. Serves as snapshot existence check and as cheap 'zfs send' size estimate.
+    """
+    cmd = ['zfs', 'list', '-H', '-p', '-o', f'name,{size_property}', '-t', 'snapshot'] + list(datasets)
+    _, output, _ = run_command(cmd, check=False, capture_output=True, suppress_stderr=True, allow_fail=True, binary=True)
+    sizes = {}
+    for line in (output.decode('ascii', 'replace').split('\n') if output else []):
+        name, _, size = line.partition('\t')
+        if name: sizes[name] = int(size) if size.isdigit() else None
+    return sizes
+
+# ZFS channel program (Lua, run by 'zfs program') that recursively destroys all datasets passed as
+# arguments inside a single transaction group. Returns a table {dataset: errno} of datasets it could
+# not destroy (e.g. mounted filesystems, which channel programs cannot unmount).
+ZFS_DESTROY_CHANNEL_PROGRAM = """
+local argv = (...)["argv"]
+local failed = {}
+local function collect(ds, order)
+    local children = {}
+    for child in zfs.list.children(ds) do table.insert(children, child) end
+    for _, child in ipairs(children) do collect(child, order) end
+    for snap in zfs.list.snapshots(ds) do table.insert(order, snap) end
+    table.insert(order, ds)
+end
+for _, ds in ipairs(argv) do
+    local order = {}
+    collect(ds, order)
+    for _, target in ipairs(order) do
+        local err = zfs.sync.destroy(target)
+        if err ~= 0 then failed[ds] = err; break end
+    end
+end
+return failed
+"""
+ZFS_DESTROY_BATCH_SIZE = 200 # Datasets per channel program run (stays well below the instruction limit)
+ZFS_DESTROY_MAX_WORKERS = 8 # Concurrent 'zfs destroy -r' runs for what the channel program left over
+
+def destroy_datasets_batched(dataset_paths):
+    """
+    Destroys datasets recursively with one 'zfs program' invocation (one TXG) per pool and batch.
+    Returns the list of datasets that were not destroyed, i.e. all of them if channel programs
+    are unavailable (old ZFS, missing privileges) so the caller can fall back to 'zfs destroy'.
+    """
+    by_pool = {}
+    for ds_path in dataset_paths:
+        by_pool.setdefault(ds_path.partition('/')[0], []).append(ds_path)
+
+    remaining = []
+    try:
+        with tempfile.NamedTemporaryFile('w', prefix='pve-zfs-destroy-', suffix='.lua', delete=True) as script:
+            script.write(ZFS_DESTROY_CHANNEL_PROGRAM)
+            script.flush()
+            for pool, paths in by_pool.items():
+                for i in range(0, len(paths), ZFS_DESTROY_BATCH_SIZE):
+                    batch = paths[i:i + ZFS_DESTROY_BATCH_SIZE]
+                    # Plain subprocess.run: run_command() would exit the script if 'zfs' cannot be started
+                    proc = subprocess.run(['zfs', 'program', '-j', pool, script.name] + batch, executable=which_tool('zfs'), stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors='replace')
+                    try:
+                        failed = json.loads(proc.stdout).get("return") if proc.returncode == 0 and proc.stdout else None
+                    except (ValueError, AttributeError):
+                        failed = None
+                    if failed is None: # Program did not run: leave the whole batch to the fallback
+                        remaining.extend(batch)
+                    else:
+                        remaining.extend(ds for ds in batch if ds in failed)
+    except OSError:
+        return list(dataset_paths)
+    return remaining
+
+def destroy_dataset_recursive(ds_path):
+    """Runs 'zfs destroy -r' for one dataset and returns its exit code (-1 if 'zfs' could not be started)."""
+    try:
+        return subprocess.run(['zfs', 'destroy', '-r', ds_path], executable=which_tool('zfs'), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode
+    except OSError:
+        return -1
+
+def destroy_datasets(dataset_paths, description="dataset"):
+    """
+    Recursively destroys ZFS datasets created during a failed operation.
+    'zfs destroy' takes a single filesystem/volume per call (the comma list syntax only
+    applies to snapshots of one dataset), so all datasets are first destroyed together in
+    a single channel program per pool. Whatever that could not handle (mounted filesystems,
+    no channel program support) is destroyed with 'zfs destroy -r'; these are independent
+    siblings, so they run concurrently on a small thread pool.
+    """
+    for ds_path in reversed(dataset_paths):
+        print_warning(f"    Destroying {description}: {ds_path}")
+    remaining = destroy_datasets_batched(list(reversed(dataset_paths)))
+
+    if not remaining:
+        return
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(ZFS_DESTROY_MAX_WORKERS, len(remaining))) as executor:
+        # Still in reverse order of creation; map() yields results in submission order
+        for ds_path, returncode in zip(remaining, executor.map(destroy_dataset_recursive, remaining)):
+            if returncode != 0:
+                print_warning(f"    'zfs destroy -r {ds_path}' failed (rc={returncode}). Manual cleanup may be required.")
+
+def get_snapshot_size_estimate(snapshot_name, send_flags=None):
+    """Estimates the size of a ZFS snapshot for 'zfs send' (with the same send flags as the real send)."""
+    return estimate_send_size(snapshot_name, tuple(send_flags or ()))
+
+@functools.lru_cache(maxsize=4096)
+def estimate_send_size(snapshot_name, send_flags):
+    """Runs the 'zfs send -nP' dry run. Cached; a snapshot's content (and so its stream size) never changes."""
+    cmd = ['zfs', 'send', '-nP', *send_flags, snapshot_name]
     success, output, stderr = run_command(cmd, check=False, capture_output=True, suppress_stderr=True, allow_fail=True)
     if success and output:
-        match = re.search(r'^size\s+(\d+)$', output, re.MULTILINE)
-        if match: return int(match.group(1))
+        # Parsable output ends with a 'size<TAB><bytes>' line; scan backwards with a prefix compare
+        for line in reversed(output.splitlines()):
+            if line.startswith('size'):
+                parts = line.split()
+                if len(parts) == 2 and parts[1].isdigit(): return int(parts[1])
     return None
 
-def adjust_config_file(conf_path, instance_type, new_id=None, target_pve_storage=None, dataset_map=None, name_prefix="clone-"):
+def adjust_config_file(src_path, dst_path, instance_type, new_id=None, target_pve_storage=None, dataset_map=None, name_prefix="clone-"):
     """
-    Makes adjustments to a configuration file for cloning or restoring.
+    Writes the configuration file src_path to dst_path with the adjustments for cloning or restoring.
+    The source is read once and the destination written once (no copy followed by an in-place rewrite).
     """
-    print_info(f"\nAdjusting configuration file {color_text(str(conf_path), 'BLUE')}...")
-    if not conf_path.is_file():
-        print_error(f"Config file {conf_path} not found for adjustments.", exit_code=1)
-
+    print_info(f"\nWriting adjusted configuration {color_text(str(dst_path), 'BLUE')} (from {src_path})...")
     try:
-        with open(conf_path, 'r') as f_orig:
-            lines = f_orig.readlines()
+        # Only the current config is adjusted; snapshot sections are copied verbatim. The source is parsed once and
+        # shared by all clones of a run (keyed by mtime), so each call costs one stat instead of an is_file() check and a read.
+        active_lines, snapshot_text, snapshot_header_line_numbers = read_config_sections(src_path)
 
         modified_lines = []
         changes_made = False
         pve_storage_to_use = target_pve_storage if target_pve_storage else DEFAULT_PVE_STORAGE
 
-        storage_regex_vm = re.compile(r'^(scsi|ide|sata|virtio|efidisk|tpmstate)(\d+):\s*([^#]+)')
-        storage_regex_lxc = re.compile(r'^(rootfs|mp\d+):\s*([^#]+)')
+        storage_key_bases = VM_STORAGE_KEY_BASES if instance_type == "vm" else LXC_STORAGE_KEY_BASES
 
-        processing_active_config = True
-        for line_num, line in enumerate(lines):
+        for line in active_lines:
             original_line = line
             line_strip = line.strip()
             modified = False
 
-            if line_strip.startswith('['): # Start of a snapshot section in config
-                print_warning(f"  Skipping Proxmox VE config snapshot section starting at line {line_num+1}")
-                processing_active_config = False
-
-            if not processing_active_config or not line_strip or line_strip.startswith('#'):
+            if not line_strip or line_strip.startswith('#'):
                 modified_lines.append(line)
                 continue
 
-            if re.match(r'^onboot:\s*[01]', line_strip) and line_strip != "onboot: 0":
-                new_line_content = "onboot: 0"
-                line = new_line_content + "\n"
-                print(f"  Setting '{color_text('onboot: 0', 'YELLOW')}'")
-                modified = True
-            elif name_prefix and line_strip.startswith('name:') and not line_strip.split(':', 1)[1].strip().startswith(name_prefix):
-                 new_line_content = re.sub(r'(^name:\s*)(.+)', rf'\1{name_prefix}\2', line.strip())
-                 line = new_line_content + "\n"
-                 print(f"  Adding '{color_text(name_prefix, 'YELLOW')}' prefix to name")
-                 modified = True
-            elif name_prefix and instance_type == 'lxc' and line_strip.startswith('hostname:') and not line_strip.split(':', 1)[1].strip().startswith(name_prefix):
-                 new_line_content = re.sub(r'(^hostname:\s*)(.+)', rf'\1{name_prefix}\2', line.strip())
-                 line = new_line_content + "\n"
-                 print(f"  Adding '{color_text(name_prefix, 'YELLOW')}' prefix to hostname")
-                 modified = True
-            elif re.match(r'^net\d+:', line_strip):
+            # Tokenize once ('key: value') and dispatch on the key instead of testing every pattern against the line
+            key, sep, value = line_strip.partition(':')
+            value = value.strip()
+            storage_key = None
+            current_dataset_name = None
+            line_options_part = ""
+            # One rstrip classifies numbered keys (net0, scsi1, mp2, ...) with set lookups instead of a regex per key kind
+            key_base = key.rstrip(CONFIG_KEY_DIGITS)
+            numbered = len(key_base) != len(key)
+
+            if not sep:
+                pass # Not a 'key: value' line, keep as is
+            elif key == 'onboot':
+                if value[:1] in ('0', '1') and line_strip != "onboot: 0":
+                    line = "onboot: 0\n"
+                    print(f"  Setting '{color_text('onboot: 0', 'YELLOW')}'")
+                    modified = True
+            elif key == 'name' or (key == 'hostname' and instance_type == 'lxc'):
+                if name_prefix and value and not value.startswith(name_prefix):
+                    line = f"{key}: {name_prefix}{value}\n"
+                    print(f"  Adding '{color_text(name_prefix, 'YELLOW')}' prefix to {key}")
+                    modified = True
+            elif numbered and key_base == 'net':
                 if 'link_down=1' not in line_strip:
-                    parts = line_strip.split('#', 1)
-                    main_part = parts[0].rstrip()
-                    comment_part = f" #{parts[1]}" if len(parts) > 1 else ""
+                    main_part, has_comment, comment = line_strip.partition('#')
+                    main_part = main_part.rstrip()
+                    comment_part = f" #{comment}" if has_comment else ""
 
                     if main_part.split(':')[-1].strip() and not main_part.endswith(','):
                          main_part += ","
@@ -544,39 +1040,14 @@ def adjust_config_file(conf_path, instance_type, new_id=None, target_pve_storage
                     line = main_part + comment_part + "\n"
                     print(f"  Adding '{color_text('link_down=1', 'YELLOW')}' to network interface: {original_line.strip()}")
                     modified = True
-
-            match = None
-            storage_key = None
-            current_storage_name = None
-            current_dataset_name = None
-            line_options_part = ""
-
-            if instance_type == "vm":
-                match = storage_regex_vm.match(line_strip)
-                if match:
-                    key_base = match.group(1)
-                    key_num = match.group(2)
-                    storage_key = f"{key_base}{key_num}"
-                    details_part = match.group(3).strip()
-                    # Example: local-zfs:vm-100-disk-0,size=32G  or  otherstore:some/path/image.qcow2,size=30G
-                    storage_match = re.match(r'([^:]+):([^,]+)(.*)', details_part)
-                    if storage_match:
-                         current_storage_name = storage_match.group(1).strip()
-                         current_dataset_name = storage_match.group(2).strip() # e.g., vm-100-disk-0 or some/path/image.qcow2
-                         line_options_part = storage_match.group(3).strip() # e.g., ,size=32G or ,size=30G
-
-            else: # LXC
-                match = storage_regex_lxc.match(line_strip)
-                if match:
-                    storage_key = match.group(1) # rootfs or mpX
-                    details_part = match.group(2).strip()
-                    # Example: local-zfs:subvol-105-disk-0,size=8G  or storage:volume,mp=/mnt/test,size=4G
-                    storage_match = re.match(r'([^:]+):([^,]+)(.*)', details_part)
-                    if storage_match:
-                        current_storage_name = storage_match.group(1).strip()
-                        current_dataset_name = storage_match.group(2).strip() # e.g., subvol-105-disk-0 or volume
-                        line_options_part = storage_match.group(3).strip() # e.g., ,size=8G or ,mp=/mnt/test,size=4G
-
+            elif (numbered and key_base in storage_key_bases) or (key == 'rootfs' and instance_type == 'lxc'):
+                storage_key = key # e.g. scsi0, efidisk0 (VM) or rootfs, mp0 (LXC)
+                details_part = value.partition('#')[0].strip()
+                # Example: local-zfs:vm-100-disk-0,size=32G  or  storage:volume,mp=/mnt/test,size=4G
+                storage_match = STORAGE_VOLUME_REGEX.match(details_part)
+                if storage_match:
+                    current_dataset_name = storage_match.group(2).strip() # e.g., vm-100-disk-0 or subvol-105-disk-0
+                    line_options_part = storage_match.group(3).strip() # e.g., ,size=32G or ,mp=/mnt/test,size=4G
 
             if storage_key and current_dataset_name and dataset_map and storage_key in dataset_map:
                 new_dataset_basename = dataset_map[storage_key] # This is just the basename, e.g., vm-NEWID-disk-0
@@ -592,80 +1063,102 @@ def adjust_config_file(conf_path, instance_type, new_id=None, target_pve_storage
             modified_lines.append(line)
             if modified: changes_made = True
 
+        for line_num in snapshot_header_line_numbers:
+            print_warning(f"  Skipping Proxmox VE config snapshot section starting at line {line_num+1}")
+        modified_lines.append(snapshot_text)
 
+        # Permissions are not copied: the targets live on pmxcfs (/etc/pve), which enforces its own.
+        # 'x' (O_EXCL) creates the file only if it does not exist yet, so the existence test is part of the create itself.
+        with open(dst_path, 'x') as f_new:
+            f_new.writelines(modified_lines)
         if changes_made:
-            with open(conf_path, 'w') as f_new:
-                f_new.writelines(modified_lines)
             print_success("  Configuration adjustments applied.")
         else:
              print_info("  No configuration adjustments needed or applied.")
 
-    except FileNotFoundError:
-         print_error(f"Config file {conf_path} disappeared before adjustments could be written.", exit_code=1)
+    except FileNotFoundError as e:
+        if e.filename != str(src_path): # Target directory missing: handled like any other write error
+            print_error(f"\nError writing adjusted config file {dst_path}: {e}")
+            raise
+        print_error(f"Config file {src_path} not found for adjustments.", exit_code=1)
+    except FileExistsError:
+        print_error(f"\nConfig file {dst_path} already exists (created after the collision check). Not overwriting it.")
+        raise # The caller cleans up its datasets but must leave the existing file alone
     except Exception as e:
-        print_error(f"\nError adjusting config file {conf_path}: {e}")
-        print_warning(f"Config file {conf_path} may not have been properly adjusted.")
+        print_error(f"\nError writing adjusted config file {dst_path}: {e}")
+        raise # Let the caller remove the incomplete file and clean up its datasets
 
 
-def find_zfs_datasets(conf_path, pve_storage_name, zfs_pool_path):
+@functools.lru_cache(maxsize=16)
+def get_storage_patterns(pve_storage_name):
     """
-    Finds ZFS datasets referenced in a config file for a specific PVE storage.
+    Returns the compiled VM/LXC disk line regexes and a substring tag for a PVE storage name.
+    Cached, so the storage name is escaped and the patterns compiled only once per name.
     """
-    storage_datasets = {}
-    instance_type = "vm" if 'qemu-server' in conf_path.parts else "lxc"
     escaped_pve_storage_name = re.escape(pve_storage_name)
     # Regex to match lines like: scsi0: PVE_STORAGE_NAME:vm-100-disk-0,size=32G  OR  rootfs: PVE_STORAGE_NAME:subvol-101-disk-0,size=8G
     storage_regex_vm = re.compile(rf'^(scsi|ide|sata|virtio|efidisk|tpmstate)(\d+):\s*{escaped_pve_storage_name}:([^,\s]+)')
     storage_regex_lxc = re.compile(rf'^(rootfs|mp\d+):\s*{escaped_pve_storage_name}:([^,\s]+)')
+    return storage_regex_vm, storage_regex_lxc, f"{pve_storage_name}:"
+
+
+def find_zfs_datasets(conf_path, pve_storage_name, zfs_pool_path):
+    """
+    Finds ZFS datasets referenced in a config file for a specific PVE storage.
+    """
+    storage_datasets = {}
+    candidate_datasets = {} # key -> full dataset path, verified with one 'zfs list' after parsing
+    instance_type = "vm" if 'qemu-server' in conf_path.parts else "lxc"
+    storage_regex_vm, storage_regex_lxc, storage_tag = get_storage_patterns(pve_storage_name)
 
     print_info(f"Searching for ZFS datasets in {conf_path} linked to storage '{pve_storage_name}' (Pool: '{zfs_pool_path}')...")
     try:
-        with open(conf_path, 'r') as f:
-            processing_current_config = True # To skip snapshot sections in the config
-            for line_num, line in enumerate(f):
-                line = line.strip()
-                if line.startswith('['): # Start of a snapshot section
-                    processing_current_config = False
-                if not processing_current_config: continue
-
-                if not line or line.startswith('#') or line.startswith('parent='): continue # Skip comments, empty lines, parent relations
-
-                match = None; key = ""; dataset_name_part = ""
-                if instance_type == "vm":
-                    match = storage_regex_vm.match(line)
-                    if match:
-                        key_base = match.group(1)
-                        key_num = match.group(2)
-                        key = f"{key_base}{key_num}"
-                        dataset_name_part = match.group(3).strip()
-                else: # LXC
-                    match = storage_regex_lxc.match(line)
-                    if match:
-                        key = match.group(1) # rootfs or mpX
-                        dataset_name_part = match.group(2).strip()
-
-                if key and dataset_name_part:
-                    # dataset_name_part is usually like 'vm-100-disk-0' or 'subvol-101-disk-0'
-                    # It should NOT contain the pool path if it's from PVE_STORAGE_NAME
-                    # The full ZFS path is typically PVE_ZFS_POOL_PATH/dataset_name_part
-                    if dataset_name_part.startswith(zfs_pool_path + '/'):
-                        # This case implies the config might have the full path already, unusual for PVE ZFS storage
-                        full_dataset_path = dataset_name_part
-                        print_warning(f"  (Line {line_num+1}) Dataset '{dataset_name_part}' for key '{key}' seems to include the pool path. Using as is.")
-                    elif '/' in dataset_name_part and not dataset_name_part.startswith('/'):
-                        # This could be something like 'some_subdir/vm-100-disk-0' if PVE storage is configured with a subdir
-                        full_dataset_path = f"{zfs_pool_path.rstrip('/')}/{dataset_name_part}"
-                        print_warning(f"  (Line {line_num+1}) Interpreting relative path '{dataset_name_part}' as '{full_dataset_path}' under pool '{zfs_pool_path}'")
-                    else:
-                        # Standard case: dataset_name_part is just the final component
-                        full_dataset_path = f"{zfs_pool_path.rstrip('/')}/{dataset_name_part}"
+        active_lines = read_config_sections(conf_path)[0] # Cached and shared with adjust_config_file(); snapshot sections excluded
+        for line_num, line in enumerate(active_lines):
+            line = line.strip()
+            if not line or line.startswith('#') or line.startswith('parent='): continue # Skip comments, empty lines, parent relations
+            if storage_tag not in line: continue # Cheap prefilter: line does not reference this storage at all
+
+            match = None; key = ""; dataset_name_part = ""
+            if instance_type == "vm":
+                match = storage_regex_vm.match(line)
+                if match:
+                    key_base = match.group(1)
+                    key_num = match.group(2)
+                    key = f"{key_base}{key_num}"
+                    dataset_name_part = match.group(3).strip()
+            else: # LXC
+                match = storage_regex_lxc.match(line)
+                if match:
+                    key = match.group(1) # rootfs or mpX
+                    dataset_name_part = match.group(2).strip()
+
+            if key and dataset_name_part:
+                # dataset_name_part is usually like 'vm-100-disk-0' or 'subvol-101-disk-0'
+                # It should NOT contain the pool path if it's from PVE_STORAGE_NAME
+                # The full ZFS path is typically PVE_ZFS_POOL_PATH/dataset_name_part
+                if dataset_name_part.startswith(zfs_pool_path + '/'):
+                    # This case implies the config might have the full path already, unusual for PVE ZFS storage
+                    full_dataset_path = dataset_name_part
+                    print_warning(f"  (Line {line_num+1}) Dataset '{dataset_name_part}' for key '{key}' seems to include the pool path. Using as is.")
+                elif '/' in dataset_name_part and not dataset_name_part.startswith('/'):
+                    # This could be something like 'some_subdir/vm-100-disk-0' if PVE storage is configured with a subdir
+                    full_dataset_path = f"{zfs_pool_path.rstrip('/')}/{dataset_name_part}"
+                    print_warning(f"  (Line {line_num+1}) Interpreting relative path '{dataset_name_part}' as '{full_dataset_path}' under pool '{zfs_pool_path}'")
+                else:
+                    # Standard case: dataset_name_part is just the final component
+                    full_dataset_path = f"{zfs_pool_path.rstrip('/')}/{dataset_name_part}"
                     
-                    # Verify this dataset actually exists on ZFS
-                    if get_zfs_property(full_dataset_path, 'type'): # 'type' is a basic property all datasets have
-                         storage_datasets[key] = full_dataset_path
-                         print(f"  Found {color_text(key, 'BLUE')} -> {full_dataset_path}")
-                    else:
-                        print_warning(f"  Dataset for {color_text(key, 'BLUE')} ('{full_dataset_path}') not found via 'zfs get type'. Skipping.")
+                candidate_datasets[key] = full_dataset_path
+
+        # Verify all datasets actually exist on ZFS with a single 'zfs list' instead of one 'zfs get type' each
+        existing_datasets = list_zfs_names(list(candidate_datasets.values()), 'filesystem,volume') if candidate_datasets else set()
+        for key, full_dataset_path in candidate_datasets.items():
+            if full_dataset_path in existing_datasets:
+                 storage_datasets[key] = full_dataset_path
+                 print(f"  Found {color_text(key, 'BLUE')} -> {full_dataset_path}")
+            else:
+                print_warning(f"  Dataset for {color_text(key, 'BLUE')} ('{full_dataset_path}') not found via 'zfs list'. Skipping.")
                         
     except FileNotFoundError:
         print_error(f"Configuration file {conf_path} not found.", exit_code=1)
@@ -677,6 +1170,14 @@ def find_zfs_datasets(conf_path, pve_storage_name, zfs_pool_path):
 
     return storage_datasets, instance_type
 
+
+# One disk of a clone/export run: config key, full ZFS dataset path and its basename (e.g. vm-100-disk-0)
+DiskJob = collections.namedtuple('DiskJob', 'key dataset basename')
+
+def build_disk_jobs(storage_datasets):
+    """Returns the datasets found by find_zfs_datasets as DiskJobs in config order, built once per run."""
+    return [DiskJob(key, dataset_path, dataset_path.rpartition('/')[2]) for key, dataset_path in storage_datasets.items()]
+
 def select_reference_dataset(storage_datasets, instance_type):
     """Determines the reference dataset for snapshot listing based on conventions."""
     if not storage_datasets:
@@ -690,8 +1191,8 @@ def select_reference_dataset(storage_datasets, instance_type):
             ref_key = 'rootfs'
         else:
             # Fallback for LXC: find lowest numbered mpX, or first available if no mpX
-            mp_keys = sorted([k for k in storage_datasets if k.startswith('mp')], key=lambda x: int(x[2:]))
-            if mp_keys: ref_key = mp_keys[0]
+            mp_keys = [key for key in storage_datasets if len(key) > 2 and key.rstrip(CONFIG_KEY_DIGITS) == 'mp']
+            if mp_keys: ref_key = min(mp_keys, key=lambda key: int(key[2:]))
             else: # No rootfs, no mpX, pick first available sorted by key
                 sorted_keys = sorted(storage_datasets.keys())
                 if sorted_keys: ref_key = sorted_keys[0]
@@ -701,14 +1202,13 @@ def select_reference_dataset(storage_datasets, instance_type):
         ref_dataset = storage_datasets[ref_key]
 
     else: # VM
-        disk_num_regex = re.compile(r'(scsi|ide|sata|virtio)(\d+)$')
         numbered_disks = {} # Store as {disk_number: {'key': key, 'dataset': dataset}}
         efi_key = None; tpm_key = None;
 
         for key, dataset in storage_datasets.items():
-             match = disk_num_regex.match(key)
-             if match:
-                 disk_num = int(match.group(2))
+             key_base = key.rstrip(CONFIG_KEY_DIGITS)
+             if key_base in VM_DISK_KEY_BASES and len(key_base) != len(key):
+                 disk_num = int(key[len(key_base):])
                  numbered_disks[disk_num] = {'key': key, 'dataset': dataset}
              elif key.startswith('efidisk') and not efi_key: # Take the first efidisk found
                  efi_key = key
@@ -741,7 +1241,7 @@ def select_reference_dataset(storage_datasets, instance_type):
 
 def parse_snapshot_indices(index_str, max_index):
     """Helper function to parse snapshot index input (e.g., "0,1,3-5")."""
-    selected_indices = set()
+    intervals = [] # (start, end) per part, merged below instead of collecting every index in a set
     if not index_str.strip():
         return [] # Return empty list if input is empty
     parts = index_str.split(',')
@@ -751,12 +1251,12 @@ def parse_snapshot_indices(index_str, max_index):
             continue
         if '-' in part:
             try:
-                start_str, end_str = part.split('-', 1)
+                start_str, _, end_str = part.partition('-') # '-' is known to be present
                 start = int(start_str)
                 end = int(end_str)
                 if not (0 <= start <= end <= max_index):
                     raise ValueError("Invalid range values or order.")
-                selected_indices.update(range(start, end + 1))
+                intervals.append((start, end))
             except ValueError as e: # Catches non-integer parts or bad range
                 raise ValueError(f"Invalid range format: '{part}'. {e}")
         else:
@@ -764,10 +1264,17 @@ def parse_snapshot_indices(index_str, max_index):
                 idx = int(part)
                 if not (0 <= idx <= max_index):
                     raise ValueError("Index out of bounds.")
-                selected_indices.add(idx)
+                intervals.append((idx, idx))
             except ValueError: # Catches non-integer parts
                 raise ValueError(f"Invalid index format: '{part}'.")
-    return sorted(list(selected_indices))
+
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + 1: # Overlapping or adjacent
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return list(itertools.chain.from_iterable(range(start, end + 1) for start, end in merged))
 
 
 def select_snapshots(ref_dataset):
@@ -777,13 +1284,13 @@ def select_snapshots(ref_dataset):
         print_error(f"No snapshots found for the reference dataset {ref_dataset}.", exit_code=1)
 
     print("\nAvailable snapshots (oldest first):")
-    snapshots.sort(key=lambda x: x['creation_timestamp']) # Sort by creation time, oldest first
+    # Already oldest first: list_snapshots() has 'zfs list' sort by creation ('-s creation'), no Python sort needed
 
     # Prepare data for display and calculate column widths
     display_data = []
     for i, snap in enumerate(snapshots):
         idx_str = f"[{i}]" # Display index based on sorted list
-        snap_suffix = snap['name'].split('@', 1)[1]
+        snap_suffix = snap['name'].partition('@')[2]
         creation_dt = datetime.fromtimestamp(snap['creation_timestamp']) if snap['creation_timestamp'] else None
         human_time = creation_dt.strftime('%Y-%m-%d %H:%M:%S') if creation_dt else "Unknown time"
         # Use .get() with default 0 for byte counts to avoid errors if keys are missing
@@ -838,19 +1345,22 @@ def select_snapshots(ref_dataset):
           f"{'-'*max_used_width:>{max_used_width}}")
 
 
+    blue, yellow, nc = COLORS['BLUE'], COLORS['YELLOW'], COLORS['NC']
+    table_rows = [] # Written with one print_block() instead of one write per snapshot
     for i, data in enumerate(display_data): # 'i' still matches the displayed index
-        idx_colored = color_text(data["idx_str"], 'BLUE')
+        idx_colored = f"{blue}{data['idx_str']}{nc}"
         # Color the size values for better visibility
-        written_colored = color_text(data["written"], 'YELLOW')
-        refer_colored = color_text(data["refer"], 'YELLOW')
-        used_colored = color_text(data["used"], 'YELLOW')
+        written_colored = f"{yellow}{data['written']}{nc}"
+        refer_colored = f"{yellow}{data['refer']}{nc}"
+        used_colored = f"{yellow}{data['used']}{nc}"
 
-        print(f"  {idx_colored:<{max_idx_width + len_ansi_blue}}  "
-              f"{data['suffix']:<{max_suffix_width}}  "
-              f"{data['time']:<{max_time_width}}  "
-              f"{written_colored:>{max_written_width + len_ansi_yellow}}  "
-              f"{refer_colored:>{max_refer_width + len_ansi_yellow}}  "
-              f"{used_colored:>{max_used_width + len_ansi_yellow}}")
+        table_rows.append(f"  {idx_colored:<{max_idx_width + len_ansi_blue}}  "
+                          f"{data['suffix']:<{max_suffix_width}}  "
+                          f"{data['time']:<{max_time_width}}  "
+                          f"{written_colored:>{max_written_width + len_ansi_yellow}}  "
+                          f"{refer_colored:>{max_refer_width + len_ansi_yellow}}  "
+                          f"{used_colored:>{max_used_width + len_ansi_yellow}}")
+    if table_rows: print_block(table_rows)
 
 
     selected_snapshot_infos = []
@@ -871,13 +1381,11 @@ def select_snapshots(ref_dataset):
             # The 'idx' from parse_snapshot_indices will directly correspond
             # to the index in the now oldest-first 'display_data' list.
             for idx in raw_indices:
-                selected_snap_original = display_data[idx]['original_snap'] # Get original snap data
-                selected_snapshot_full_name = selected_snap_original['name']
-                snap_suffix = selected_snapshot_full_name.split('@', 1)[1]
+                data = display_data[idx] # Suffix and formatted time were computed for the listing already
                 selected_snapshot_infos.append({
-                    'name': selected_snapshot_full_name, # Full ZFS snapshot name
-                    'suffix': snap_suffix,               # Just the part after '@'
-                    'display_name': snap_suffix + f" ({datetime.fromtimestamp(selected_snap_original['creation_timestamp']).strftime('%Y-%m-%d %H:%M:%S') if selected_snap_original['creation_timestamp'] else 'Unknown time'})"
+                    'name': data['original_snap']['name'], # Full ZFS snapshot name
+                    'suffix': data['suffix'],              # Just the part after '@'
+                    'display_name': f"{data['suffix']} ({data['time']})"
                 })
 
             if selected_snapshot_infos:
@@ -906,23 +1414,22 @@ def generate_new_dataset_name(old_dataset_path, old_id, new_id, target_zfs_pool_
     old_dataset_name = Path(old_dataset_path).name # e.g., vm-100-disk-0 or subvol-100-disk-0
     new_dataset_name = old_dataset_name # Default to old name if no replacement patterns match
 
-    # Patterns to replace OLD_ID with NEW_ID in the dataset name component
-    # Order matters: more specific patterns first.
-    patterns_to_try = [
-        (rf'-{old_id}-', f'-{new_id}-'),     # -ID- -> -NEWID- (e.g., vm-100-disk -> vm-NEWID-disk)
-        (rf'-{old_id}$', f'-{new_id}'),       # -ID  -> -NEWID (e.g., vm-100 -> vm-NEWID)
-        (rf'^{old_id}-', f'{new_id}-'),       # ID-  -> NEWID- (e.g., 100-disk -> NEWID-disk)
-        (rf'_{old_id}_', f'_{new_id}_'),     # _ID_ -> _NEWID_
-        (rf'{old_id}', f'{new_id}'),         # ID   -> NEWID (most generic, last resort)
-    ]
-    replaced = False
-    for pattern, replacement in patterns_to_try:
-        # Apply substitution, count=1 ensures only the first occurrence is replaced per pattern.
-        temp_name, num_subs = re.subn(pattern, replacement, old_dataset_name, count=1)
-        if num_subs > 0:
-            new_dataset_name = temp_name
-            replaced = True
-            break # Stop after the first successful replacement
+    # Replace OLD_ID with NEW_ID in the dataset name component. The patterns are plain substrings (optionally
+    # anchored), so str operations do the job without regexes. Order matters: more specific patterns first.
+    old_id, new_id = str(old_id), str(new_id)
+    replaced = True
+    if f'-{old_id}-' in old_dataset_name:        # -ID- -> -NEWID- (e.g., vm-100-disk -> vm-NEWID-disk)
+        new_dataset_name = old_dataset_name.replace(f'-{old_id}-', f'-{new_id}-', 1)
+    elif old_dataset_name.endswith(f'-{old_id}'):  # -ID  -> -NEWID (e.g., vm-100 -> vm-NEWID)
+        new_dataset_name = old_dataset_name[:-len(old_id)] + new_id
+    elif old_dataset_name.startswith(f'{old_id}-'): # ID-  -> NEWID- (e.g., 100-disk -> NEWID-disk)
+        new_dataset_name = new_id + old_dataset_name[len(old_id):]
+    elif f'_{old_id}_' in old_dataset_name:      # _ID_ -> _NEWID_
+        new_dataset_name = old_dataset_name.replace(f'_{old_id}_', f'_{new_id}_', 1)
+    elif old_id in old_dataset_name:             # ID   -> NEWID (most generic, last resort)
+        new_dataset_name = old_dataset_name.replace(old_id, new_id, 1)
+    else:
+        replaced = False
 
     if not replaced:
         # Fallback if no pattern matched: append new_id to avoid direct collision, but warn user.
@@ -935,6 +1442,80 @@ def generate_new_dataset_name(old_dataset_path, old_id, new_id, target_zfs_pool_
 
 # --- Mode Functions ---
 
+def clone_disk(key, dataset_path, new_dataset_target_path, snap_suffix, new_id_str, clone_mode,
+               pv_available, verbose=False, parallel=False, snapshot_sizes=None, buffer_cmd=None, send_flags=None):
+    """
+    Clones one disk for one snapshot, either as a linked 'zfs clone' or as a full copy
+    (zfs send [| mbuffer] [| pv] | zfs receive). send_flags are extra 'zfs send' options for full copies.
+    Returns (success, new_dataset_path). new_dataset_path is None if the disk was skipped.
+    """
+    # dataset_path is like 'rpool/data/vm-100-disk-0', snap_suffix like 'autosnap_2023-10-26_14-00-01'
+    source_snapshot_for_this_disk = f"{dataset_path}@{snap_suffix}"
+
+    print_block([ # One write per header block; also keeps it together when disks run concurrently
+        f"\n  {color_text(f'Processing disk {key}', 'CYAN')} for snapshot '{snap_suffix}' -> new ID {new_id_str}",
+        f"    Source dataset:  {color_text(dataset_path, 'BLUE')}",
+        f"    Source snapshot: {color_text(source_snapshot_for_this_disk, 'BLUE')}",
+        f"    Target dataset:  {color_text(new_dataset_target_path, 'GREEN')}"
+    ])
+
+    # Crucial check: Does the specific snapshot exist for THIS disk?
+    # A snapshot on the reference disk doesn't guarantee it exists for all other disks if they were added/removed between snapshots.
+    snapshot_exists = (source_snapshot_for_this_disk in snapshot_sizes) if snapshot_sizes is not None else get_zfs_property(source_snapshot_for_this_disk, 'type')
+    if not snapshot_exists:
+        print_warning(f"    [WARN] Snapshot '{source_snapshot_for_this_disk}' does not exist for this specific dataset. Skipping disk {key}.")
+        return True, None # Skip this disk, not an error
+
+    if clone_mode == 'linked':
+        clone_cmd = ['zfs', 'clone', source_snapshot_for_this_disk, new_dataset_target_path]
+        print(f"    Executing linked clone: {' '.join(clone_cmd)}")
+        success, _, stderr = run_command(clone_cmd, check=False, capture_output=True, allow_fail=True)
+        if not success:
+            print_error(f"    Error during 'zfs clone' for {key}: {stderr}")
+            return False, None
+        print_success(f"    Linked clone of {key} successful.")
+        return True, new_dataset_target_path
+
+    # Full clone (send/receive)
+    if snapshot_sizes is not None:
+        estimated_size_bytes = snapshot_sizes.get(source_snapshot_for_this_disk)
+    else:
+        estimated_size_bytes = get_snapshot_size_estimate(source_snapshot_for_this_disk, send_flags)
+    size_str = f"~{format_bytes(estimated_size_bytes)}" if estimated_size_bytes is not None else "Unknown size"
+    print(f"    Estimated size ({key}): {size_str}")
+
+    send_cmd = ['zfs', 'send'] + (send_flags or []) + [source_snapshot_for_this_disk]
+    recv_cmd = ['zfs', 'receive', '-o', 'readonly=off', new_dataset_target_path] # Ensure writable
+    pipeline_cmds = [send_cmd]
+    pipeline_names = ["zfs send"]
+    pv_opts = None
+
+    if buffer_cmd:
+        pipeline_cmds.append(buffer_cmd) # Decouples 'zfs send' from 'zfs receive' stalls
+        pipeline_names.append("mbuffer")
+
+    progress_label = f'clone-{key}-{new_id_str}'
+    if pv_available:
+        pv_cmd_base = ['pv']
+        pv_opts = ['-p', '-t', '-r', '-b', '-N', progress_label]
+        if parallel: pv_opts.append('-c') # Cursor positioning so concurrent progress bars don't overwrite each other
+        if estimated_size_bytes: pv_opts.extend(['-s', str(estimated_size_bytes)])
+        pipeline_cmds.append(pv_cmd_base)
+        pipeline_names.append("pv")
+
+    pipeline_cmds.append(recv_cmd)
+    pipeline_names.append("zfs receive")
+
+    if verbose:
+        print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])}")
+    if not run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts, progress_label=progress_label, progress_size=estimated_size_bytes):
+        print_error(f"    Error during 'zfs send/receive' pipeline for {key}.")
+        return False, None
+
+    print_success(f"    Full clone (send/receive) of {key} successful.")
+    return True, new_dataset_target_path
+
+
 def do_clone(args):
     """Performs the cloning process."""
     print_info("=== Running Clone Mode ===")
@@ -973,6 +1554,9 @@ def do_clone(args):
 
 
     print_info(f"Selected mode: {clone_mode.capitalize()} Clone")
+    if clone_mode == 'full':
+        # Source and target datasets share the pool here, so a linked clone would avoid copying any data
+        print_info("  Full clone streams 'zfs send' directly into 'zfs receive' (no stream file). Use --clone-mode linked for an instant copy-on-write clone.")
     if src_instance_type == "vm":
         perform_ram_check(pve_cmd, src_id) # pve_cmd is 'qm' here
     else: # LXC
@@ -993,10 +1577,46 @@ def do_clone(args):
     print_info(f"Target ZFS Pool Path: {target_zfs_pool_path}")
     print_info(f"Target PVE Storage: {target_pve_storage}")
 
-    pv_available = is_tool('pv')
+    pv_available = use_progress_bar(args.no_pv)
+    buffer_cmd = get_mbuffer_command(args.mbuffer_size)
     overall_clone_success = True
+    # Snapshots of all source disks in one 'zfs list' instead of one 'zfs get' per disk and snapshot.
+    # Full clones also take their size estimate from it instead of a 'zfs send -nP' each. Source and target share the
+    # pool, so the stream can always carry large, embedded and compressed blocks as stored ('referenced' size).
+    send_flags = list(DEFAULT_ZFS_SEND_FLAGS)
+    snapshot_sizes = list_snapshot_sizes(list(storage_datasets.values()), 'referenced')
+    disk_jobs = build_disk_jobs(storage_datasets) # Shared by all snapshots
     successful_clones_summary = []
 
+    # Target dataset names of all queued snapshots (one new ID each), checked for collisions with a single 'zfs list'
+    planned_targets = [
+        {job.key: generate_new_dataset_name(job.dataset, src_id, str(base_new_id_int + i), target_zfs_pool_path)
+         for job in disk_jobs} # job.dataset is the full path like rpool/data/vm-SRCID-disk-0
+        for i in range(len(selected_snapshots_info_list))
+    ]
+    existing_targets = list_zfs_names([name for targets in planned_targets for name in targets.values()], 'filesystem,volume')
+
+    # Report every collision of every queued ID up front and abort before anything is created
+    last_new_id_int = base_new_id_int + len(planned_targets) - 1
+    id_range_str = str(base_new_id_int) if last_new_id_int == base_new_id_int else f"{base_new_id_int}-{last_new_id_int}"
+    print_info(f"Checking for config and target dataset collisions for new ID(s) {id_range_str}...")
+    collision_found = False
+    for i, targets in enumerate(planned_targets):
+        new_id_str = str(base_new_id_int + i)
+        # VMs and containers share one ID namespace, so both directories are checked; the config itself is created with O_EXCL
+        for conf_dir, conf_type in (("qemu-server", "VM"), ("lxc", "LXC")):
+            conf_path = Path(f"/etc/pve/{conf_dir}/{new_id_str}.conf")
+            if conf_path.exists():
+                print_error(f"  Config file for {conf_type} ID {new_id_str} ({conf_path}) already exists!")
+                collision_found = True
+        for key, new_dataset_target_path in targets.items():
+            if new_dataset_target_path in existing_targets:
+                print_error(f"  Target dataset '{new_dataset_target_path}' for key '{key}' (new ID {new_id_str}) already exists.")
+                collision_found = True
+    if collision_found:
+        print_error("Aborting clone due to the collision(s) above. Nothing was created; choose a different --new-id.", exit_code=1)
+    print_success("  No collisions found.")
+
     for i, snap_info in enumerate(selected_snapshots_info_list):
         current_new_id_int = base_new_id_int + i
         current_new_id_str = str(current_new_id_int)
@@ -1004,121 +1624,52 @@ def do_clone(args):
 
         print_info(f"\nProcessing Snapshot: {color_text(snap_suffix, 'YELLOW')} for new ID {color_text(current_new_id_str, 'BLUE')}")
 
-        # Check for config file collision for the new ID
-        new_conf_path_vm = Path(f"/etc/pve/qemu-server/{current_new_id_str}.conf")
-        new_conf_path_lxc = Path(f"/etc/pve/lxc/{current_new_id_str}.conf")
-        collision = False
-        if new_conf_path_vm.exists(): print_error(f"Config file for VM ID {current_new_id_str} ({new_conf_path_vm}) already exists!"); collision = True
-        if new_conf_path_lxc.exists(): print_error(f"Config file for LXC ID {current_new_id_str} ({new_conf_path_lxc}) already exists!"); collision = True
-        if collision:
-            print_error(f"Aborting clone for snapshot '{snap_suffix}' due to config collision for ID {current_new_id_str}.")
-            overall_clone_success = False
-            break # Stop processing further snapshots if one fails due to collision
-
-        new_conf_path = new_conf_path_vm if src_instance_type == "vm" else new_conf_path_lxc
+        new_conf_path = Path(f"/etc/pve/{'qemu-server' if src_instance_type == 'vm' else 'lxc'}/{current_new_id_str}.conf")
         cloned_datasets_map_this_snap = {} # To pass to adjust_config_file
         all_ops_successful_this_snap = True
         cleanup_list_this_snap = [] # ZFS datasets created for this snapshot clone attempt
 
-        # Pre-check for ZFS dataset collisions for ALL disks of this snapshot
-        print_info(f"  Checking for potential target dataset collisions for ID {current_new_id_str}...")
-        potential_targets_this_snap = {} # Store generated target paths to avoid re-generating
-        dataset_collision_found_this_snap = False
-        for key, dataset_path_in_source_config in storage_datasets.items():
-            # dataset_path_in_source_config is the full path like rpool/data/vm-SRCID-disk-0
-            new_dataset_target_path = generate_new_dataset_name(dataset_path_in_source_config, src_id, current_new_id_str, target_zfs_pool_path)
-            potential_targets_this_snap[key] = new_dataset_target_path
-            if get_zfs_property(new_dataset_target_path, 'type'): # Check if dataset exists
-                print_error(f"  Target dataset '{new_dataset_target_path}' for key '{key}' (new ID {current_new_id_str}) already exists.")
-                dataset_collision_found_this_snap = True
-        
-        if dataset_collision_found_this_snap:
-            print_error(f"Aborting clone for snapshot '{snap_suffix}' due to target dataset collision(s) for ID {current_new_id_str}.")
-            overall_clone_success = False
-            break # Stop processing further snapshots
-
-        print_success(f"  No target dataset collisions found for ID {current_new_id_str}.")
-
-
-        # Process each disk for the current snapshot
-        for key, dataset_path_in_source_config in storage_datasets.items():
-            # dataset_path_in_source_config is like 'rpool/data/vm-100-disk-0'
-            # snap_suffix is like 'autosnap_2023-10-26_14-00-01'
-            source_snapshot_for_this_disk = f"{dataset_path_in_source_config}@{snap_suffix}"
-            new_dataset_target_path = potential_targets_this_snap[key] # Use pre-generated name
-
-            print(f"\n  {color_text(f'Processing disk {key}', 'CYAN')} for snapshot '{snap_suffix}' -> new ID {current_new_id_str}")
-            print(f"    Source dataset:  {color_text(dataset_path_in_source_config, 'BLUE')}")
-            print(f"    Source snapshot: {color_text(source_snapshot_for_this_disk, 'BLUE')}")
-            print(f"    Target dataset:  {color_text(new_dataset_target_path, 'GREEN')}")
+        potential_targets_this_snap = planned_targets[i] # Generated and checked for collisions before the loop
 
-            # Crucial check: Does the specific snapshot exist for THIS disk?
-            # A snapshot on the reference disk doesn't guarantee it exists for all other disks if they were added/removed between snapshots.
-            if not get_zfs_property(source_snapshot_for_this_disk, 'type'):
-                 print_warning(f"    [WARN] Snapshot '{source_snapshot_for_this_disk}' does not exist for this specific dataset. Skipping this disk.")
-                 continue # Skip this disk, try next one for this snapshot clone
-
-            op_success_this_disk = False
-            if clone_mode == 'linked':
-                clone_cmd = ['zfs', 'clone', source_snapshot_for_this_disk, new_dataset_target_path]
-                print(f"    Executing linked clone: {' '.join(clone_cmd)}")
-                try:
-                    run_command(clone_cmd, check=True, capture_output=False, error_msg="ZFS clone failed")
-                    print_success("    Linked clone successful.")
-                    op_success_this_disk = True
-                except SystemExit: # run_command calls sys.exit on error if check=True
-                    print_error("    Error during 'zfs clone'.")
-                    all_ops_successful_this_snap = False # Mark this snapshot's clone as failed
-                    break # Stop processing other disks for this snapshot
-            else: # Full clone (send/receive)
-                print("    Preparing full clone (send/receive)...")
-                estimated_size_bytes = get_snapshot_size_estimate(source_snapshot_for_this_disk)
-                size_str = f"~{format_bytes(estimated_size_bytes)}" if estimated_size_bytes is not None else "Unknown size"
-                print(f"    Estimated size: {size_str}")
-
-                send_cmd = ['zfs', 'send', source_snapshot_for_this_disk]
-                recv_cmd = ['zfs', 'receive', '-o', 'readonly=off', new_dataset_target_path] # Ensure writable
-                pipeline_cmds = [send_cmd]
-                pipeline_names = ["zfs send"]
-                pv_opts = None
-
-                if pv_available:
-                    pv_cmd_base = ['pv']
-                    pv_opts = ['-p', '-t', '-r', '-b', '-N', f'clone-{key}-{current_new_id_str}']
-                    if estimated_size_bytes: pv_opts.extend(['-s', str(estimated_size_bytes)])
-                    pipeline_cmds.append(pv_cmd_base)
-                    pipeline_names.append("pv")
-                else:
-                    print_warning("    Executing full clone without progress bar ('pv' not found).")
-                
-                pipeline_cmds.append(recv_cmd)
-                pipeline_names.append("zfs receive")
-
-                print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])}")
-                pipeline_successful = run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts)
-
-                if pipeline_successful:
-                     print_success("    Full clone (send/receive) successful.")
-                     op_success_this_disk = True
-                else:
-                    print_error("    Error during 'zfs send/receive' pipeline.")
-                    all_ops_successful_this_snap = False # Mark this snapshot's clone as failed
-                    # run_pipeline should have already tried to clean up its output file if it created one
-                    break # Stop processing other disks for this snapshot
-            
-            if op_success_this_disk:
-                cloned_datasets_map_this_snap[key] = Path(new_dataset_target_path).name # Store only basename for config adjustment
-                cleanup_list_this_snap.append(new_dataset_target_path) # Store full path for potential cleanup
-            else:
-                # This path should ideally not be reached if errors cause breaks/SystemExit
-                pass
+        if len(disk_jobs) == 1: # The common single-disk guest: clone inline, no thread pool or future bookkeeping
+            job = disk_jobs[0]
+            disk_success, new_dataset_target_path = clone_disk(
+                job.key, job.dataset, potential_targets_this_snap[job.key], snap_suffix, current_new_id_str,
+                clone_mode, pv_available, args.verbose, False, snapshot_sizes, buffer_cmd, send_flags
+            )
+            if not disk_success:
+                all_ops_successful_this_snap = False
+            elif new_dataset_target_path:
+                cloned_datasets_map_this_snap[job.key] = new_dataset_target_path.rpartition('/')[2]
+                cleanup_list_this_snap.append(new_dataset_target_path)
+        else:
+            # Disks are independent streams, so clone them concurrently (one clone/pipeline per disk).
+            # Without a compressor in the pipeline the streams wait on the pool's vdevs, not the CPU, so allow two per core.
+            max_workers = max(1, min(len(disk_jobs), (os.cpu_count() or 1) * 2))
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        clone_disk, job.key, job.dataset, potential_targets_this_snap[job.key], snap_suffix, current_new_id_str,
+                        clone_mode, pv_available, args.verbose, max_workers > 1, snapshot_sizes, buffer_cmd, send_flags
+                    ): job.key
+                    for job in disk_jobs
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    key = futures[future]
+                    disk_success, new_dataset_target_path = future.result()
+                    if not disk_success:
+                        all_ops_successful_this_snap = False # Mark this snapshot's clone as failed
+                        for pending in futures: pending.cancel() # Stop cloning other disks for this snapshot
+                    elif new_dataset_target_path:
+                        cloned_datasets_map_this_snap[key] = new_dataset_target_path.rpartition('/')[2] # Store only basename for config adjustment
+                        cleanup_list_this_snap.append(new_dataset_target_path) # Store full path for potential cleanup
 
         # After processing all disks for the current snapshot:
         if not all_ops_successful_this_snap:
              print_error(f"\nOne or more ZFS {clone_mode} clone operations failed for snapshot '{snap_suffix}' (new ID {current_new_id_str}). Attempting cleanup...")
-             for ds_path in reversed(cleanup_list_this_snap): # Destroy in reverse order of creation
-                 print_warning(f"    Destroying partially created dataset: {ds_path}")
-                 run_command(['zfs', 'destroy', '-r', ds_path], check=False, capture_output=False, suppress_stderr=True)
+             destroy_datasets(cleanup_list_this_snap, "partially created dataset")
              overall_clone_success = False # Mark overall process as having issues
              break # Stop processing further snapshots if one fails critically
 
@@ -1135,10 +1686,9 @@ def do_clone(args):
         print_info(f"\n  Creating new {config_type_str} configuration {color_text(str(new_conf_path), 'BLUE')} for ID {current_new_id_str}")
         config_created_successfully_this_snap = False
         try:
-            shutil.copy2(src_conf_path, new_conf_path)
-            print_success(f"  Copied base configuration from {src_conf_path} to {new_conf_path}.")
             adjust_config_file(
-                conf_path=new_conf_path,
+                src_path=src_conf_path,
+                dst_path=new_conf_path,
                 instance_type=src_instance_type,
                 new_id=current_new_id_str, # For potential internal use by adjust_config, though not strictly used by current version
                 target_pve_storage=target_pve_storage,
@@ -1152,15 +1702,13 @@ def do_clone(args):
 
         except Exception as e:
             print_error(f"  Error processing config file {new_conf_path} for ID {current_new_id_str}: {e}")
-            if new_conf_path.exists():
+            if new_conf_path.exists() and not isinstance(e, FileExistsError): # Never remove a config this run did not create
                 print_warning(f"  Removing potentially incomplete config file: {new_conf_path}")
                 try: new_conf_path.unlink()
                 except OSError as del_err: print_warning(f"  Could not remove config file: {del_err}")
             
             print_warning(f"  Attempting to clean up cloned ZFS datasets for ID {current_new_id_str} due to config error...")
-            for ds_path in reversed(cleanup_list_this_snap): # Destroy in reverse order
-                 print_warning(f"    Destroying cloned dataset: {ds_path}")
-                 run_command(['zfs', 'destroy', '-r', ds_path], check=False, capture_output=False, suppress_stderr=True)
+            destroy_datasets(cleanup_list_this_snap, "cloned dataset")
             overall_clone_success = False
             break # Stop processing further snapshots if config fails
 
@@ -1180,16 +1728,166 @@ def do_clone(args):
              print_error("Clone process failed or was aborted. Some clones may not have been created or are incomplete.")
 
 
+def export_disk(job, snap_suffix, snap_suffix_sanitized, current_export_dir,
+                compress_method, compress_tool_info, pv_available, verbose=False, parallel=False, snapshot_sizes=None,
+                send_flags=None, buffer_cmd=None):
+    """
+    Exports the ZFS stream of one disk (a DiskJob) for one snapshot (zfs send [| mbuffer] [| pv] [| compressor] > file).
+    snapshot_sizes is an optional prefetched {snapshot: size} dict used for the existence check and size estimate.
+    send_flags are extra 'zfs send' options (e.g. -L -e -c). buffer_cmd is an optional mbuffer step.
+    Returns (success, metadata_entry). metadata_entry is None if the disk was skipped.
+    """
+    key, dataset_path, dataset_basename = job
+    target_snapshot_for_disk = f"{dataset_path}@{snap_suffix}"
+    data_suffix = compress_tool_info["suffix"] # e.g., .zfs.stream.gz or .zfs.stream
+    stream_filename = f"{key}{data_suffix}" # e.g., scsi0.zfs.stream.gz
+    data_export_path = current_export_dir / stream_filename
+
+    print_block([ # One write per header block; also keeps it together when disks run concurrently
+        f"\n  {color_text(f'Exporting disk {key}', 'CYAN')}",
+        f"    Source dataset:  {color_text(dataset_path, 'BLUE')}",
+        f"    Source snapshot: {color_text(target_snapshot_for_disk, 'BLUE')}",
+        f"    Output file:     {color_text(str(data_export_path), 'BLUE')}"
+    ])
+
+    snapshot_exists = (target_snapshot_for_disk in snapshot_sizes) if snapshot_sizes is not None else get_zfs_property(target_snapshot_for_disk, 'type')
+    if not snapshot_exists:
+        print_warning(f"    [WARN] Snapshot '{target_snapshot_for_disk}' does not exist for this dataset. Skipping export for {key}.")
+        return True, None # Skip this disk, not an error
+
+    if snapshot_sizes is not None:
+        estimated_size_bytes = snapshot_sizes.get(target_snapshot_for_disk)
+    else:
+        estimated_size_bytes = get_snapshot_size_estimate(target_snapshot_for_disk, send_flags)
+    size_str = f"~{format_bytes(estimated_size_bytes)}" if estimated_size_bytes is not None else "Unknown size"
+    print(f"    Estimated raw size ({key}): {size_str}")
+
+    send_cmd = ['zfs', 'send'] + (send_flags or []) + [target_snapshot_for_disk]
+    pipeline_cmds = [send_cmd]
+    pipeline_names = ["zfs send"]
+    pv_opts = None
+
+    if buffer_cmd:
+        pipeline_cmds.append(buffer_cmd) # Decouples 'zfs send' from compressor/disk stalls
+        pipeline_names.append("mbuffer")
+
+    progress_label = f'export-{key}-{snap_suffix_sanitized}'
+    if pv_available:
+        pv_cmd_base = ['pv']
+        # -W: wait for transfer. Others are for progress display.
+        pv_opts = ['-W', '-p', '-t', '-r', '-b', '-N', progress_label]
+        if parallel: pv_opts.append('-c') # Cursor positioning so concurrent progress bars don't overwrite each other
+        if estimated_size_bytes: pv_opts.extend(['-s', str(estimated_size_bytes)])
+        pipeline_cmds.append(pv_cmd_base)
+        pipeline_names.append("pv")
+
+    if compress_method != "none":
+        compress_cmd = compress_tool_info["compress"] # e.g., ['gzip', '-c']
+        pipeline_cmds.append(compress_cmd)
+        pipeline_names.append(compress_method) # e.g., "gzip"
+
+    if verbose:
+        print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])} > {data_export_path}")
+    # run_pipeline will handle opening data_export_path for writing and hashes the stream while writing it
+    stream_hash = hashlib.sha256()
+    # Without pv, progress counts the bytes written to the file: compressed ones, so the stream estimate is no total then
+    pipeline_successful = run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts, output_file=data_export_path, output_hash=stream_hash,
+                                       progress_label=progress_label, progress_size=estimated_size_bytes if compress_method == "none" else None)
+
+    if not pipeline_successful:
+        # run_pipeline should attempt to remove incomplete output file if it created one.
+        print_error(f"    Error during ZFS data export for {key}.")
+        return False, None
+
+    print_success(f"    ZFS data for {key} exported successfully.")
+    return True, {
+        'key': key, # e.g., scsi0
+        'original_dataset_basename': dataset_basename, # e.g., vm-100-disk-0
+        'original_dataset_path': dataset_path, # Full original path, e.g. rpool/data/vm-100-disk-0
+        'stream_file': stream_filename, # e.g., scsi0.zfs.stream.gz
+        'stream_suffix': data_suffix, # e.g., .zfs.stream.gz
+        'sha256': stream_hash.hexdigest() # Of the stream file as written (after compression)
+    }
+
+
+def remove_export_dir(export_dir, created_files):
+    """
+    Removes an incomplete export directory by unlinking the files this run created and then the
+    directory itself. Leftover files are removed in one scandir pass (file types come from the
+    directory entries, no stat per file); only subdirectories need a full shutil.rmtree.
+    """
+    for file_path in created_files:
+        try: os.unlink(file_path)
+        except FileNotFoundError: pass
+    try:
+        export_dir.rmdir()
+        return
+    except OSError: # Not empty (e.g. a leftover partial stream file)
+        pass
+    with os.scandir(export_dir) as entries:
+        leftovers = list(entries)
+    if any(entry.is_dir(follow_symlinks=False) for entry in leftovers):
+        shutil.rmtree(export_dir)
+        return
+    for entry in leftovers:
+        try: os.unlink(entry.path)
+        except FileNotFoundError: pass
+    export_dir.rmdir()
+
+
+def export_disk_local_clone(job, snap_suffix, snap_suffix_sanitized, src_id, local_clone_path, snapshot_sizes=None):
+    """
+    Exports one disk (a DiskJob) for one snapshot as a ZFS clone in the same pool instead of a data stream.
+    Returns (success, metadata_entry). metadata_entry is None if the disk was skipped.
+    """
+    key, dataset_path, dataset_basename = job
+    target_snapshot_for_disk = f"{dataset_path}@{snap_suffix}"
+    clone_dataset = f"{local_clone_path}/export-{src_id}-{snap_suffix_sanitized}-{dataset_basename}"
+
+    print_block([ # One write per header block; also keeps it together when disks run concurrently
+        f"\n  {color_text(f'Exporting disk {key} (local clone)', 'CYAN')}",
+        f"    Source snapshot: {color_text(target_snapshot_for_disk, 'BLUE')}",
+        f"    Clone dataset:   {color_text(clone_dataset, 'BLUE')}"
+    ])
+
+    snapshot_exists = (target_snapshot_for_disk in snapshot_sizes) if snapshot_sizes is not None else get_zfs_property(target_snapshot_for_disk, 'type')
+    if not snapshot_exists:
+        print_warning(f"    [WARN] Snapshot '{target_snapshot_for_disk}' does not exist for this dataset. Skipping export for {key}.")
+        return True, None # Skip this disk, not an error
+
+    success, _, stderr = run_command(['zfs', 'clone', target_snapshot_for_disk, clone_dataset], check=False, capture_output=True, allow_fail=True)
+    if not success:
+        print_error(f"    Error creating local clone for {key}: {stderr}")
+        return False, None
+
+    print_success(f"    Local clone for {key} created.")
+    return True, {
+        'key': key, # e.g., scsi0
+        'original_dataset_basename': dataset_basename, # e.g., vm-100-disk-0
+        'original_dataset_path': dataset_path, # Full original path, e.g. rpool/data/vm-100-disk-0
+        'clone_dataset': clone_dataset # Full path of the clone holding the data, no stream file
+    }
+
+
 def do_export(args):
     """Performs the export process."""
     print_info("=== Running Export Mode ===")
     src_id = args.source_id
     parent_export_dir_base = Path(args.export_dir)
     compress_method = args.compress
+    if compress_method is None: # Not given on the command line: prefer zstd, fall back to gzip
+        compress_method = DEFAULT_COMPRESSION_METHOD
+        if not check_compression_tools(compress_method)[0]:
+            print_warning(f"Default compression '{compress_method}' not available, using '{DEFAULT_COMPRESSION_FALLBACK}' instead.")
+            compress_method = DEFAULT_COMPRESSION_FALLBACK
     source_zfs_pool_path = args.source_zfs_pool_path # From where datasets are read
     source_pve_storage = args.source_pve_storage   # PVE storage name linked in source config
 
-    compress_ok, _, compress_tool_info = check_compression_tools(compress_method)
+    if args.compression_threads is not None and args.compression_threads < 1:
+        print_error("--compression-threads must be at least 1.", exit_code=1)
+    if args.zstd_level == 0 or args.zstd_level > 19:
+        print_error("--zstd-level must be between 1 and 19, or negative for the fast levels.", exit_code=1)
+    compress_ok, _, compress_tool_info = check_compression_tools(compress_method, threads=args.compression_threads, zstd_level=args.zstd_level)
     if compress_tool_info is None: # Should not happen if compress_method is valid
         print_error(f"Failed to get compression tool info for method '{compress_method}'. Aborting export.", exit_code=1)
     if compress_method != "none" and not compress_ok:
@@ -1197,6 +1895,24 @@ def do_export(args):
     if compress_method != "none":
          print_info(f"Using compression method: {compress_method}")
 
+    send_flags = [] if args.plain_send else list(DEFAULT_ZFS_SEND_FLAGS)
+    if args.send_raw: send_flags.append("-w") # Raw send: encrypted datasets stay encrypted in the stream
+
+    local_clone_path = None
+    if args.local_clone:
+        local_clone_path = (args.local_clone_path or source_zfs_pool_path).rstrip('/')
+        # A ZFS clone can only live in the pool of its origin snapshot
+        if local_clone_path.partition('/')[0] != source_zfs_pool_path.partition('/')[0]:
+            print_warning(f"Local clone path '{local_clone_path}' is not in the source pool '{source_zfs_pool_path.partition('/')[0]}'. Falling back to stream export.")
+            local_clone_path = None
+        else:
+            print_info(f"Using local clone export under: {local_clone_path} (no data is streamed or compressed)")
+            compress_method = "none"
+            send_flags = []
+
+    if send_flags:
+        print_info(f"Using zfs send flags: {' '.join(send_flags)}")
+
 
     src_conf_path, src_instance_type = find_instance_config(src_id)
     if not src_conf_path:
@@ -1217,13 +1933,57 @@ def do_export(args):
     if not selected_snapshots_info_list:
         print_error("No snapshots selected. Aborting export.", exit_code=1)
 
-    pv_available = is_tool('pv')
+    # Encrypted datasets can be sent raw (-w): the blocks leave the pool as stored, without decrypting them.
+    encrypted_datasets = set()
+    if send_flags:
+        encryption_values = get_zfs_property_values(storage_datasets.values(), 'encryption')
+        encrypted_datasets = {name for name, value in encryption_values.items() if value not in ('off', '-', '')}
+        if encrypted_datasets and '-w' not in send_flags:
+            print_info(f"Encrypted source dataset(s) found ({', '.join(sorted(encrypted_datasets))}). Use --send-raw to export them without decrypting and re-compressing.")
+
+    # With 'zfs send -c'/'-w' the stream carries the on-disk blocks; if all datasets already store them
+    # compressed (or encrypted, with -w) an external compressor mostly burns CPU, so skip it unless --compress was given explicitly.
+    # Independent of the send flags: where ZFS compression is on but achieved ~1.00x, ZFS has already found the
+    # data incompressible (e.g. encrypted guest filesystems), and gzip/zstd would only slow the export down.
+    if args.compress is None and compress_method != "none":
+        compression_values = get_zfs_property_values(storage_datasets.values(), 'compression')
+        stored_compressed = {ds for ds in storage_datasets.values() if compression_values.get(ds, '') not in ('off', 'none', '')}
+        raw_encrypted = encrypted_datasets if '-w' in send_flags else set()
+        if ('-c' in send_flags or '-w' in send_flags) and all(ds in stored_compressed or ds in raw_encrypted for ds in storage_datasets.values()):
+            print_info(f"All source datasets are stored compressed or encrypted and sent as stored ({' '.join(send_flags)}); skipping '{compress_method}'. Use --compress to force it.")
+            compress_method = "none"
+        elif len(stored_compressed) == len(storage_datasets):
+            ratio_values = get_zfs_property_values(storage_datasets.values(), 'compressratio')
+            try:
+                incompressible = all(ds in ratio_values and float(ratio_values[ds].rstrip('x')) <= INCOMPRESSIBLE_COMPRESSRATIO for ds in storage_datasets.values())
+            except ValueError:
+                incompressible = False
+            if incompressible:
+                print_info(f"ZFS compression achieves no gain on the source datasets (compressratio <= {INCOMPRESSIBLE_COMPRESSRATIO:.2f}x); skipping '{compress_method}'. Use --compress to force it.")
+                compress_method = "none"
+        if compress_method == "none":
+            compress_tool_info = COMPRESSION_TOOLS["none"]
+
+    # Disks are exported concurrently; without an explicit --compression-threads split the cores between
+    # the per-disk compressors instead of letting every one of them start a thread per core.
+    if args.compression_threads is None and compress_method != "none" and len(storage_datasets) > 1 and not local_clone_path:
+        threads_per_stream = max(1, (os.cpu_count() or 1) // len(storage_datasets))
+        compress_tool_info = check_compression_tools(compress_method, threads=threads_per_stream, zstd_level=args.zstd_level)[2]
+
+    pv_available = use_progress_bar(args.no_pv)
+    buffer_cmd = get_mbuffer_command(args.mbuffer_size)
     overall_export_success = True
+
+    # One 'zfs list' for all selected snapshots replaces a 'zfs get' existence check and a 'zfs send -nP' estimate per disk and snapshot.
+    # With 'zfs send -c' the stream carries on-disk (compressed) blocks, so 'referenced' is the closer estimate.
+    size_property = 'referenced' if '-c' in send_flags or '-w' in send_flags else 'logicalreferenced'
+    snapshot_sizes = list_snapshot_sizes(list(storage_datasets.values()), size_property)
+    disk_jobs = build_disk_jobs(storage_datasets) # Shared by all snapshots
     successful_exports_summary = []
 
     for snap_info in selected_snapshots_info_list:
         snap_suffix = snap_info['suffix'] # e.g., autosnap_...
-        snap_suffix_sanitized = re.sub(r'[^a-zA-Z0-9_\-.]', '_', snap_suffix) # Sanitize for dir name
+        snap_suffix_sanitized = SNAPSHOT_SUFFIX_UNSAFE_REGEX.sub('_', snap_suffix) # Sanitize for dir name
         current_export_dir = parent_export_dir_base / f"{src_id}_{snap_suffix_sanitized}"
         # This is the full name of the reference snapshot for this iteration, used for metadata
         ref_snapshot_name_this_iter = f"{ref_dataset}@{snap_suffix}" 
@@ -1232,8 +1992,9 @@ def do_export(args):
 
         try:
             current_export_dir.mkdir(parents=True, exist_ok=False) # Fail if exists
-            # Test writability briefly
-            with tempfile.NamedTemporaryFile(prefix='write_test_', dir=current_export_dir, delete=True): pass
+            # Test writability with a single access() check instead of creating and deleting a probe file
+            if not os.access(current_export_dir, os.W_OK):
+                raise PermissionError(f"No write permission for {current_export_dir}")
         except FileExistsError:
             print_error(f"Export directory '{current_export_dir}' already exists. Please remove it or choose a different parent directory. Skipping this snapshot.", exit_code=None) # No exit_code to allow loop to continue
             overall_export_success = False # Mark that at least one export failed
@@ -1252,13 +2013,13 @@ def do_export(args):
         config_export_path = current_export_dir / f"{src_id}{DEFAULT_EXPORT_CONFIG_SUFFIX}"
         print_info(f"\n  Exporting configuration to {color_text(str(config_export_path), 'BLUE')}")
         try:
-            shutil.copy2(src_conf_path, config_export_path)
+            copy_file_fast(src_conf_path, config_export_path)
             print_success("  Configuration file exported successfully.")
         except Exception as e:
             print_error(f"  Failed to export configuration file: {e}. Aborting export for this snapshot.")
             overall_export_success = False
             if current_export_dir.exists(): # Cleanup directory if config export failed
-                try: shutil.rmtree(current_export_dir)
+                try: remove_export_dir(current_export_dir, [config_export_path])
                 except Exception as rme: print_warning(f"Could not remove incomplete export dir {current_export_dir}: {rme}")
             continue # Skip to next snapshot
 
@@ -1266,71 +2027,45 @@ def do_export(args):
         exported_disks_metadata_this_snap = [] # For the .meta.json file
         all_data_ops_successful_this_snap = True
 
-        for key, dataset_path in storage_datasets.items(): # dataset_path is full ZFS path
-            target_snapshot_for_disk = f"{dataset_path}@{snap_suffix}"
-            data_suffix = compress_tool_info["suffix"] # e.g., .zfs.stream.gz or .zfs.stream
-            stream_filename = f"{key}{data_suffix}" # e.g., scsi0.zfs.stream.gz
-            data_export_path = current_export_dir / stream_filename
-
-            print(f"\n  {color_text(f'Exporting disk {key}', 'CYAN')}")
-            print(f"    Source dataset:  {color_text(dataset_path, 'BLUE')}")
-            print(f"    Source snapshot: {color_text(target_snapshot_for_disk, 'BLUE')}")
-            print(f"    Output file:     {color_text(str(data_export_path), 'BLUE')}")
-
-            if not get_zfs_property(target_snapshot_for_disk, 'type'):
-                print_warning(f"    [WARN] Snapshot '{target_snapshot_for_disk}' does not exist for this dataset. Skipping export for {key}.")
-                continue # Skip this disk, try next one
-
-            estimated_size_bytes = get_snapshot_size_estimate(target_snapshot_for_disk)
-            size_str = f"~{format_bytes(estimated_size_bytes)}" if estimated_size_bytes is not None else "Unknown size"
-            print(f"    Estimated raw size: {size_str}")
-
-            send_cmd = ['zfs', 'send', target_snapshot_for_disk]
-            pipeline_cmds = [send_cmd]
-            pipeline_names = ["zfs send"]
-            pv_opts = None
-
-            if pv_available:
-                pv_cmd_base = ['pv']
-                # -W: wait for transfer. Others are for progress display.
-                pv_opts = ['-W', '-p', '-t', '-r', '-b', '-N', f'export-{key}-{snap_suffix_sanitized}']
-                if estimated_size_bytes: pv_opts.extend(['-s', str(estimated_size_bytes)])
-                pipeline_cmds.append(pv_cmd_base)
-                pipeline_names.append("pv")
+        # Disks are independent streams, so export them concurrently (one pipeline per disk).
+        max_workers = max(1, min(len(storage_datasets), os.cpu_count() or 1))
+        exported_entries = {} # key -> metadata entry, re-ordered by config order below
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            if local_clone_path:
+                futures = {
+                    executor.submit(export_disk_local_clone, job, snap_suffix, snap_suffix_sanitized, src_id, local_clone_path, snapshot_sizes): job.key
+                    for job in disk_jobs
+                }
             else:
-                print_warning("    Executing export without progress bar ('pv' not found).")
-
-            if compress_method != "none":
-                compress_cmd = compress_tool_info["compress"] # e.g., ['gzip', '-c']
-                pipeline_cmds.append(compress_cmd)
-                pipeline_names.append(compress_method) # e.g., "gzip"
-            
-            print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])} > {data_export_path}")
-            # run_pipeline will handle opening data_export_path for writing
-            pipeline_successful = run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts, output_file=data_export_path)
-
-            if pipeline_successful:
-                 print_success(f"    ZFS data for {key} exported successfully.")
-                 exported_disks_metadata_this_snap.append({
-                     'key': key, # e.g., scsi0
-                     'original_dataset_basename': Path(dataset_path).name, # e.g., vm-100-disk-0
-                     'original_dataset_path': dataset_path, # Full original path, e.g. rpool/data/vm-100-disk-0
-                     'stream_file': stream_filename, # e.g., scsi0.zfs.stream.gz
-                     'stream_suffix': data_suffix # e.g., .zfs.stream.gz
-                 })
-            else:
-                print_error(f"    Error during ZFS data export for {key}.")
-                all_data_ops_successful_this_snap = False
-                # run_pipeline should attempt to remove incomplete output file if it created one.
-                # No need to manually delete data_export_path here usually.
-                break # Stop exporting other disks for this snapshot
+                futures = {
+                    executor.submit(
+                        export_disk, job, snap_suffix, snap_suffix_sanitized, current_export_dir,
+                        compress_method, compress_tool_info, pv_available, args.verbose, max_workers > 1, snapshot_sizes,
+                        send_flags, buffer_cmd
+                    ): job.key
+                    for job in disk_jobs
+                }
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                disk_success, disk_metadata = future.result()
+                if not disk_success:
+                    all_data_ops_successful_this_snap = False
+                    for pending in futures: pending.cancel() # Stop exporting other disks for this snapshot
+                elif disk_metadata:
+                    exported_entries[futures[future]] = disk_metadata
+        exported_disks_metadata_this_snap = [exported_entries[job.key] for job in disk_jobs if job.key in exported_entries]
+        created_clones_this_snap = [entry['clone_dataset'] for entry in exported_disks_metadata_this_snap if entry.get('clone_dataset')]
+        # Everything this run wrote into the export directory (failed pipelines already removed their own output file)
+        created_files_this_snap = [config_export_path] + [current_export_dir / entry['stream_file'] for entry in exported_disks_metadata_this_snap if entry.get('stream_file')]
 
         # After processing all disks for this snapshot's export
         if not all_data_ops_successful_this_snap:
             print_error(f"\nExport of ZFS data failed for snapshot '{snap_suffix}'. Aborting metadata and cleaning up directory.")
             overall_export_success = False
+            if created_clones_this_snap: destroy_datasets(created_clones_this_snap, "export clone")
             if current_export_dir.exists(): # Cleanup entire directory for this failed snapshot export
-                try: shutil.rmtree(current_export_dir)
+                try: remove_export_dir(current_export_dir, created_files_this_snap)
                 except Exception as rme: print_warning(f"Could not remove incomplete export dir {current_export_dir}: {rme}")
             continue # Skip to next snapshot in the list
 
@@ -1352,20 +2087,25 @@ def do_export(args):
             "snapshot_suffix": snap_suffix, # The common suffix for this export bundle
             "reference_snapshot_name": ref_snapshot_name_this_iter, # Full name of the reference snapshot used
             "compression_method": compress_method,
+            "zfs_send_flags": send_flags, # Flags the streams were created with (informational)
+            "export_mode": "local-clone" if local_clone_path else "stream",
             "exported_disks": exported_disks_metadata_this_snap # List of dicts for each disk
         }
         try:
-            with open(meta_export_path, 'w') as f_meta:
-                json.dump(metadata, f_meta, indent=4)
+            # Compact separators keep json on its C encoder fast path; indent=4 only on request (--pretty-meta)
+            meta_json = json.dumps(metadata, indent=4) if args.pretty_meta else json.dumps(metadata, separators=(',', ':'))
+            meta_export_path.write_bytes(meta_json.encode('utf-8')) # Serialize first, then a single write
             print_success("  Metadata file written successfully.")
             successful_exports_summary.append(
-                f"Snapshot '{snap_suffix}' -> Directory '{current_export_dir.name}' (Compression: {compress_method})"
+                f"Snapshot '{snap_suffix}' -> Directory '{current_export_dir.name}' "
+                + (f"(Local clones under: {local_clone_path})" if local_clone_path else f"(Compression: {compress_method})")
             )
         except Exception as e:
             print_error(f"  Failed to write metadata file: {e}")
             overall_export_success = False
+            if created_clones_this_snap: destroy_datasets(created_clones_this_snap, "export clone")
             if current_export_dir.exists(): # Cleanup if metadata fails
-                try: shutil.rmtree(current_export_dir)
+                try: remove_export_dir(current_export_dir, created_files_this_snap + [meta_export_path])
                 except Exception as rme: print_warning(f"Could not remove export dir {current_export_dir} after metadata failure: {rme}")
             continue # Skip to next snapshot
 
@@ -1386,6 +2126,126 @@ def do_export(args):
             print(color_text(f"Consider reviewing or removing potentially incomplete export subdirectories in {parent_export_dir_base.resolve()}", "YELLOW"))
 
 
+def restore_disk(original_key, data_import_path, new_dataset_path, compress_method, decompress_tool_info,
+                 pv_available, verbose=False, parallel=False, expected_sha256=None, buffer_cmd=None, cancel_event=None):
+    """
+    Restores the ZFS stream of one disk ([decompressor |] [pv |] [mbuffer |] zfs receive < stream file).
+    buffer_cmd is an optional mbuffer step, only used behind a decompressor (a plain file needs no buffer).
+    cancel_event is set by the caller when another disk failed; a running receive is then terminated.
+    If expected_sha256 is given, the stream file is verified before anything is received.
+    Destroys a partially received dataset on failure. Returns True on success.
+    """
+    print_block([ # One write per header block; also keeps it together when disks run concurrently
+        f"\n  {color_text(f'Restoring {original_key}', 'CYAN')}",
+        f"    Input stream:   {color_text(str(data_import_path.name), 'BLUE')}",
+        f"    Target dataset: {color_text(new_dataset_path, 'GREEN')}"
+    ])
+
+    if expected_sha256:
+        try:
+            actual_sha256 = file_sha256(data_import_path)
+        except OSError as e:
+            print_error(f"Could not read stream file {data_import_path.name} for checksum verification: {e}")
+            return False
+        if actual_sha256 != expected_sha256:
+            print_error(f"Checksum mismatch for {data_import_path.name} (expected {expected_sha256}, got {actual_sha256}). Aborting restore.")
+            return False
+        print_success(f"    SHA-256 verified for {data_import_path.name}.")
+
+    # Prepare pipeline: decompressor (if any) | pv (if any) | zfs receive, with the stream file as stdin of the first step
+    recv_cmd = ['zfs', 'receive', '-o', 'readonly=off', new_dataset_path] # Ensure writable
+    pipeline_cmds = []
+    pipeline_names = []
+    pv_opts = None
+
+    if compress_method != "none":
+        decompress_cmd = decompress_tool_info["decompress"] # e.g., ['gunzip', '-c']
+        pipeline_cmds.append(decompress_cmd)
+        pipeline_names.append(f"decompress ({compress_method})")
+
+    try:
+        file_size = data_import_path.stat().st_size
+        size_str = f"~{format_bytes(file_size)} (compressed stream)"
+    except Exception:
+        file_size = None
+        size_str = "Unknown size"
+    print(f"    Input file size ({original_key}): {size_str}")
+    progress_label = f'restore-{original_key}'
+    if pv_available:
+        pv_cmd_base = ['pv']
+        pv_opts = ['-W', '-p', '-t', '-r', '-b', '-N', progress_label]
+        if parallel: pv_opts.append('-c') # Cursor positioning so concurrent progress bars don't overwrite each other
+        if file_size: pv_opts.extend(['-s', str(file_size)])
+        pipeline_cmds.append(pv_cmd_base)
+        pipeline_names.append("pv")
+
+    if buffer_cmd and compress_method != "none":
+        pipeline_cmds.append(buffer_cmd) # Decouples 'zfs receive' from decompressor stalls
+        pipeline_names.append("mbuffer")
+
+    # Finally, zfs receive. For an uncompressed stream without pv it is the only step and reads the stream file
+    # itself as stdin: no relay process, no pipe and no copy through this script (pv, when present, splices).
+    pipeline_cmds.append(recv_cmd)
+    pipeline_names.append("zfs receive")
+
+    if verbose:
+        print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])} < {data_import_path}")
+    pipeline_successful = run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts, input_file=data_import_path,
+                                       progress_label=progress_label, progress_size=file_size, cancel_event=cancel_event)
+
+    if pipeline_successful:
+        # The stream file is not read again; drop its pages so they don't push the host's cached data out
+        try:
+            with open(data_import_path, 'rb', buffering=0) as consumed_handle:
+                advise_file(consumed_handle, 'POSIX_FADV_DONTNEED')
+        except OSError: pass
+        print_success(f"    ZFS data restore successful for {original_key}.")
+        return True
+
+    print_error(f"Error during ZFS data restore pipeline for {original_key}. Aborting restore.")
+    # run_pipeline does not create the target ZFS dataset itself, zfs receive does.
+    # If zfs receive fails, it might leave a partial dataset.
+    # We should attempt to destroy new_dataset_path if it exists after a failure.
+    if get_zfs_property(new_dataset_path, 'type'):
+        print_warning(f"    Attempting to destroy partially created dataset: {new_dataset_path}")
+        run_command(['zfs', 'destroy', '-r', new_dataset_path], check=False, capture_output=False, suppress_stderr=True)
+    return False
+
+
+def restore_disk_from_clone(original_key, clone_dataset, new_dataset_path):
+    """
+    Restores one disk of a local clone export by renaming the clone to the target dataset name.
+    Only works within the clone's pool; the export's clone is consumed. Returns True on success.
+    """
+    print_block([ # One write per header block; also keeps it together when disks run concurrently
+        f"\n  {color_text(f'Restoring {original_key} (local clone)', 'CYAN')}",
+        f"    Clone dataset:  {color_text(clone_dataset, 'BLUE')}",
+        f"    Target dataset: {color_text(new_dataset_path, 'GREEN')}"
+    ])
+
+    if clone_dataset.partition('/')[0] != new_dataset_path.partition('/')[0]:
+        print_error(f"Cannot restore {original_key}: local clone '{clone_dataset}' is not in the target pool of '{new_dataset_path}'.")
+        return False
+    success, _, stderr = run_command(['zfs', 'rename', clone_dataset, new_dataset_path], check=False, capture_output=True, allow_fail=True)
+    if not success:
+        print_error(f"Error renaming local clone for {original_key}: {stderr}")
+        return False
+    print_success(f"    ZFS data restore successful for {original_key} (clone renamed).")
+    return True
+
+
+def rename_clones_back(renamed_clones):
+    """
+    Renames local clones restored by restore_disk_from_clone ({new_dataset_path: clone_dataset}) back to
+    their export names after a failed restore. They hold the export's data, so they are never destroyed.
+    """
+    for new_dataset_path, clone_dataset in renamed_clones.items():
+        print_warning(f"    Renaming restored clone back: {new_dataset_path} -> {clone_dataset}")
+        success, _, stderr = run_command(['zfs', 'rename', new_dataset_path, clone_dataset], check=False, capture_output=True, allow_fail=True)
+        if not success:
+            print_error(f"    Could not rename {new_dataset_path} back to {clone_dataset}: {stderr}. Rename it manually to keep the export usable.")
+
+
 def do_restore(args):
     """Performs the restore process."""
     print_info("=== Running Restore Mode ===")
@@ -1412,8 +2272,7 @@ def do_restore(args):
     metadata = None
     compress_method = "none" # Default if not in metadata (older exports might miss it)
     try:
-        with open(meta_import_path, 'r') as f_meta:
-            metadata = json.load(f_meta)
+        metadata = json.loads(meta_import_path.read_bytes()) # One read; json.loads detects the UTF-8 encoding itself
         print_success("Metadata loaded successfully.")
 
         # Validate essential metadata fields
@@ -1432,20 +2291,24 @@ def do_restore(args):
              raise ValueError(f"Invalid 'compression_method' ('{compress_method}') found in metadata.")
         
         # Basic validation of disk entries (can be expanded)
+        expected_suffix_for_method = COMPRESSION_TOOLS[compress_method]["suffix"] # Same for every disk of the export
         for i, disk_info in enumerate(exported_disks):
              if not disk_info.get("key"): raise ValueError(f"Disk entry {i} missing 'key'.")
              if not disk_info.get("original_dataset_basename"): raise ValueError(f"Disk entry {i} missing 'original_dataset_basename'.")
              # original_dataset_path is good to have for naming, but might be missing in older versions
+             if disk_info.get("clone_dataset"): continue # Local clone export: no stream file involved
              if not disk_info.get("stream_file"): raise ValueError(f"Disk entry {i} missing 'stream_file'.")
              # Check stream_suffix consistency
-             expected_suffix_for_method = COMPRESSION_TOOLS[compress_method]["suffix"]
-             if disk_info.get("stream_suffix") != expected_suffix_for_method:
-                 print_warning(f"Stream suffix '{disk_info.get('stream_suffix')}' for key '{disk_info['key']}' does not match expected suffix '{expected_suffix_for_method}' for compression method '{compress_method}'. This might be okay if manually changed or an old export.")
+             stream_suffix = disk_info.get("stream_suffix")
+             if stream_suffix != expected_suffix_for_method:
+                 print_warning(f"Stream suffix '{stream_suffix}' for key '{disk_info['key']}' does not match expected suffix '{expected_suffix_for_method}' for compression method '{compress_method}'. This might be okay if manually changed or an old export.")
 
 
         print(f"  Original ID:       {original_id}")
         print(f"  Original Type:     {original_instance_type.upper()}")
         print(f"  Compression:       {compress_method}")
+        if metadata.get("zfs_send_flags"):
+            print(f"  zfs send flags:    {' '.join(metadata['zfs_send_flags'])}")
         print(f"  Disks in export:   {len(exported_disks)}")
 
     except json.JSONDecodeError:
@@ -1514,9 +2377,12 @@ def do_restore(args):
                  original_path_for_naming = f"{original_pool_for_naming.rstrip('/')}/{original_basename}"
                  print_warning(f"Original full dataset path for key '{original_key}' not in metadata, reconstructed as '{original_path_for_naming}' for naming purposes.")
 
-            new_dataset_path = generate_new_dataset_name(original_path_for_naming, original_id, new_id_str, target_zfs_pool_path)
-            potential_targets_map[original_key] = new_dataset_path
-            if get_zfs_property(new_dataset_path, 'type'): # Check if dataset exists
+            potential_targets_map[original_key] = generate_new_dataset_name(original_path_for_naming, original_id, new_id_str, target_zfs_pool_path)
+
+        # One 'zfs list' of just the planned names instead of one 'zfs get' per disk (or a listing of the whole pool)
+        existing_datasets = list_zfs_names(potential_targets_map.values(), 'filesystem,volume')
+        for original_key, new_dataset_path in potential_targets_map.items():
+            if new_dataset_path in existing_datasets:
                 print_error(f"Target ZFS dataset '{new_dataset_path}' for key '{original_key}' already exists.")
                 dataset_collision_found = True
 
@@ -1531,88 +2397,75 @@ def do_restore(args):
 
     restored_datasets_map = {} # For adjust_config_file: 'scsi0' -> 'vm-NEWID-disk-0' (basename)
     all_data_ops_successful = True
-    pv_available = is_tool('pv')
-    cleanup_list = [] # Full paths of datasets created, for cleanup on failure
+    pv_available = use_progress_bar(args.no_pv)
+    buffer_cmd = get_mbuffer_command(args.mbuffer_size)
+    cleanup_list = [] # Full paths of datasets created by 'zfs receive', for cleanup on failure
+    renamed_clones = {} # Local clones renamed into place: new dataset path -> export clone name, renamed back on failure
 
     if not exported_disks:
         print_info("No ZFS disks to restore based on metadata.")
     else:
+        # Verify all stream files and clones up front, so no disk is restored if any input is missing
+        clone_datasets = [disk_info["clone_dataset"] for disk_info in exported_disks if disk_info.get("clone_dataset")]
+        existing_clones = list_zfs_names(clone_datasets, 'filesystem,volume') if clone_datasets else set()
         for disk_info in exported_disks:
-            original_key = disk_info["key"]
-            stream_filename = disk_info["stream_file"]
-            data_import_path = import_dir / stream_filename # Full path to stream file
-            new_dataset_path = potential_targets_map[original_key] # Full path for new ZFS dataset
-
-            print(f"\n  {color_text(f'Restoring {original_key}', 'CYAN')}")
-            print(f"    Input stream:   {color_text(str(data_import_path.name), 'BLUE')}")
-            print(f"    Target dataset: {color_text(new_dataset_path, 'GREEN')}")
-
+            if disk_info.get("clone_dataset"):
+                if disk_info["clone_dataset"] not in existing_clones:
+                    print_error(f"Local clone dataset '{disk_info['clone_dataset']}' of this export no longer exists (already restored?). Aborting.")
+                    all_data_ops_successful = False
+                    break
+                continue
+            data_import_path = import_dir / disk_info["stream_file"] # Full path to stream file
             if not data_import_path.is_file():
                 print_error(f"Data stream file '{data_import_path.name}' not found in {import_dir}. Aborting.")
                 all_data_ops_successful = False
-                break # Stop processing further disks
-
-            # Prepare pipeline: cat stream | decompressor (if any) | pv (if any) | zfs receive
-            recv_cmd = ['zfs', 'receive', '-o', 'readonly=off', new_dataset_path] # Ensure writable
-            pipeline_cmds = []
-            pipeline_names = []
-            pv_opts = None
-
-            # Start with cat to read the file into the pipe
-            cat_cmd = ['cat', str(data_import_path)]
-            pipeline_cmds.append(cat_cmd)
-            pipeline_names.append("cat")
-
-            if compress_method != "none":
-                decompress_cmd = decompress_tool_info["decompress"] # e.g., ['gunzip', '-c']
-                pipeline_cmds.append(decompress_cmd)
-                pipeline_names.append(f"decompress ({compress_method})")
-
-            if pv_available:
-                pv_cmd_base = ['pv']
-                try:
-                    file_size = data_import_path.stat().st_size
-                    size_str = f"~{format_bytes(file_size)} (compressed stream)"
-                except Exception:
-                    file_size = None
-                    size_str = "Unknown size"
-                print(f"    Input file size: {size_str}")
-                pv_opts = ['-W', '-p', '-t', '-r', '-b', '-N', f'restore-{original_key}']
-                if file_size: pv_opts.extend(['-s', str(file_size)])
-                pipeline_cmds.append(pv_cmd_base)
-                pipeline_names.append("pv")
-            else:
-                print_warning("    Executing restore without progress bar ('pv' not found).")
-
-            pipeline_cmds.append(recv_cmd) # Finally, zfs receive
-            pipeline_names.append("zfs receive")
-
-            print(f"    Executing pipeline: {' | '.join([' '.join(c) for c in pipeline_cmds])}")
-            pipeline_successful = run_pipeline(pipeline_cmds, pipeline_names, pv_options=pv_opts)
+                break
 
-            if pipeline_successful:
-                print_success(f"    ZFS data restore successful for {original_key}.")
-                restored_datasets_map[original_key] = Path(new_dataset_path).name # Store basename for config
-                cleanup_list.append(new_dataset_path) # Store full path for cleanup
-            else:
-                print_error(f"Error during ZFS data restore pipeline for {original_key}. Aborting restore.")
-                all_data_ops_successful = False
-                # run_pipeline does not create the target ZFS dataset itself, zfs receive does.
-                # If zfs receive fails, it might leave a partial dataset.
-                # We should attempt to destroy new_dataset_path if it exists after a failure.
-                if get_zfs_property(new_dataset_path, 'type'):
-                    print_warning(f"    Attempting to destroy partially created dataset: {new_dataset_path}")
-                    run_command(['zfs', 'destroy', '-r', new_dataset_path], check=False, capture_output=False, suppress_stderr=True)
-                break # Stop processing further disks
+    if exported_disks and all_data_ops_successful:
+        # Disks are independent streams, so restore them concurrently (one pipeline per disk).
+        max_workers = max(1, min(len(exported_disks), os.cpu_count() or 1))
+        cancel_event = threading.Event() # Set on the first failure; stops receives still running for other disks
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {}
+            clone_datasets_by_key = {disk_info["key"]: disk_info["clone_dataset"] for disk_info in exported_disks if disk_info.get("clone_dataset")}
+            for disk_info in exported_disks:
+                if disk_info.get("clone_dataset"):
+                    future = executor.submit(restore_disk_from_clone, disk_info["key"], disk_info["clone_dataset"], potential_targets_map[disk_info["key"]])
+                else:
+                    future = executor.submit(
+                        restore_disk, disk_info["key"], import_dir / disk_info["stream_file"],
+                        potential_targets_map[disk_info["key"]], compress_method, decompress_tool_info,
+                        pv_available, args.verbose, max_workers > 1,
+                        None if args.no_verify else disk_info.get("sha256"), # Older exports carry no checksum
+                        buffer_cmd, cancel_event
+                    )
+                futures[future] = disk_info["key"]
+            for future in concurrent.futures.as_completed(futures):
+                original_key = futures[future]
+                if future.cancelled():
+                    continue
+                if future.result():
+                    clone_dataset = clone_datasets_by_key.get(original_key)
+                    if clone_dataset:
+                        renamed_clones[potential_targets_map[original_key]] = clone_dataset
+                    else:
+                        cleanup_list.append(potential_targets_map[original_key]) # Store full path for cleanup
+                else:
+                    all_data_ops_successful = False
+                    for pending in futures: pending.cancel() # Stop processing further disks
+                    cancel_event.set() # ... and terminate the ones already receiving
+        for disk_info in exported_disks: # Keep metadata order for the config mapping
+            original_key = disk_info["key"]
+            if potential_targets_map[original_key] in cleanup_list or potential_targets_map[original_key] in renamed_clones:
+                restored_datasets_map[original_key] = Path(potential_targets_map[original_key]).name # Store basename for config
 
     # After attempting to restore all disks
     if not all_data_ops_successful:
         print_error("\n--- Restore Failed During ZFS Operations ---")
-        if cleanup_list: # These are datasets that were *successfully* created before a later one failed
+        if cleanup_list or renamed_clones: # These are datasets that were *successfully* restored before a later one failed
              print_warning("Attempting to clean up successfully restored datasets from this session...")
-             for ds_path in reversed(cleanup_list): # Destroy in reverse order
-                 print_warning(f"    Destroying restored dataset: {ds_path}")
-                 run_command(['zfs', 'destroy', '-r', ds_path], check=False, capture_output=False, suppress_stderr=True)
+             if cleanup_list: destroy_datasets(cleanup_list, "restored dataset")
+             rename_clones_back(renamed_clones)
         else:
              print_info("No datasets were fully created before failure occurred, or cleanup already attempted.")
         sys.exit(1)
@@ -1621,10 +2474,9 @@ def do_restore(args):
     print_info(f"\nCreating and adjusting new configuration file: {color_text(str(new_conf_path), 'BLUE')}")
     config_created_successfully = False
     try:
-        shutil.copy2(config_import_path, new_conf_path)
-        print_success(f"Copied base configuration from {config_import_path.name} to {new_conf_path}.")
         adjust_config_file(
-            conf_path=new_conf_path,
+            src_path=config_import_path,
+            dst_path=new_conf_path,
             instance_type=original_instance_type,
             new_id=new_id_str, # For potential internal use by adjust_config
             target_pve_storage=target_pve_storage, # The PVE storage where new datasets reside
@@ -1635,16 +2487,15 @@ def do_restore(args):
 
     except Exception as e:
         print_error(f"Error processing config file {new_conf_path}: {e}")
-        if new_conf_path.exists(): # Remove bad config
+        if new_conf_path.exists() and not isinstance(e, FileExistsError): # Remove bad config, but never one this run did not create
             print_warning(f"Removing potentially incomplete config file: {new_conf_path}")
             try: new_conf_path.unlink()
             except OSError: pass
         # If config fails, also clean up ZFS datasets created in this session
-        if cleanup_list:
+        if cleanup_list or renamed_clones:
              print_warning("Attempting to clean up restored ZFS datasets due to config error...")
-             for ds_path in reversed(cleanup_list):
-                  print_warning(f"    Destroying restored dataset: {ds_path}")
-                  run_command(['zfs', 'destroy', '-r', ds_path], check=False, capture_output=False, suppress_stderr=True)
+             if cleanup_list: destroy_datasets(cleanup_list, "restored dataset")
+             rename_clones_back(renamed_clones)
         sys.exit(1)
 
     # Final success message
@@ -1655,11 +2506,18 @@ def do_restore(args):
         print(f"  Target PVE Storage:  {color_text(target_pve_storage, 'BLUE')}")
         if restored_datasets_map: # If any datasets were actually restored
              print(f"  Restored Datasets ({len(restored_datasets_map)}):")
+             pool_prefix = target_zfs_pool_path.rstrip('/')
+             blue, nc = COLORS['BLUE'], COLORS['NC']
              for key, basename in restored_datasets_map.items():
-                 full_path = f"{target_zfs_pool_path.rstrip('/')}/{basename}"
-                 print(f"    - {key} -> {color_text(full_path, 'BLUE')}")
+                 print(f"    - {key} -> {blue}{pool_prefix}/{basename}{nc}")
         else:
              print("  Restored Datasets: None (or only config was restored)")
+        if renamed_clones:
+            origins = get_zfs_property_values(renamed_clones, 'origin')
+            print_warning(f"\n  {len(renamed_clones)} disk(s) were restored from local clones and remain ZFS clones of their source snapshots:")
+            for new_dataset_path in renamed_clones:
+                print_warning(f"    - {new_dataset_path} (origin: {origins.get(new_dataset_path, 'unknown')})")
+            print_warning("  These snapshots cannot be destroyed while the restored disks exist ('zfs destroy -R' would destroy the restored disks too).")
         print(f"\n{color_text('Review the configuration:', 'YELLOW')} {color_text(str(new_conf_path), 'BLUE')}")
         print(color_text("Important: Check network settings (IP/MAC), hostname/name, resources, CD-ROMs (VMs), and link_down=1 on NICs.", 'YELLOW'))
     else:
@@ -1667,29 +2525,77 @@ def do_restore(args):
          print(f"\n{color_text('--- Restore Process Failed ---', 'RED')}")
 
 
+@functools.lru_cache(maxsize=32)
+def get_qm_config(pve_cmd, vmid):
+    """
+    Returns 'qm config <vmid>' as a dict of lowercased key -> first value token.
+    Parsed in a single pass over the output; cached, so the command runs only once per VM and session.
+    The returned dict is shared between callers and must not be modified.
+    """
+    output = run_command([pve_cmd, 'config', str(vmid)], capture_output=True, suppress_stderr=True, check=True)
+    config = {}
+    for line in output.splitlines():
+        key, sep, value = line.partition(':')
+        if sep:
+            key = key.strip().lower()
+            if key not in config: # First occurrence wins, like a search on the whole output
+                config[key] = value.split(maxsplit=1)[0] if value.strip() else ''
+    return config
+
+def get_total_ram_mb():
+    """Returns the total host RAM in MB, read from /proc/meminfo (falls back to 'free -m')."""
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemTotal:'):
+                    return int(line.split(None, 2)[1]) // 1024 # Value is in kB; only the first two fields are split
+    except (OSError, ValueError, IndexError):
+        pass
+    free_output = run_command(['free', '-m'], capture_output=True, check=True)
+    mem_line = free_output.split('\n', 2)[1] # Mem: line
+    return int(mem_line.split(None, 2)[1]) # Total RAM in MB
+
+def sum_running_vm_ram_mb(pve_cmd):
+    """
+    Sums the configured RAM (MB) of all running VMs using 'qm list --output-format=json'.
+    Returns None if the structured output is not available so the caller can parse the text output.
+    """
+    success, output, _ = run_command([pve_cmd, 'list', '--output-format=json'], check=False, capture_output=True, suppress_stderr=True, allow_fail=True)
+    if not success or not output:
+        return None
+    try:
+        vms = json.loads(output)
+        return sum(int(vm.get('maxmem') or 0) >> MB_SHIFT for vm in vms if vm.get('status') == 'running')
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+def fetch_running_vm_ram(pve_cmd):
+    """
+    Returns (sum_mb, None) from the structured 'qm list' output, or (None, 'qm list --full' text) on
+    PVE versions without --output-format, so the fallback listing is also fetched off the main thread.
+    """
+    running_ram_mb = sum_running_vm_ram_mb(pve_cmd)
+    if running_ram_mb is not None:
+        return running_ram_mb, None
+    return None, run_command([pve_cmd, 'list', '--full'], capture_output=True, suppress_stderr=True, check=True)
+
 def perform_ram_check(pve_cmd, src_id):
     """Checks host RAM usage before cloning a VM."""
     print_info("\nChecking host RAM usage...")
     try:
-        free_output = run_command(['free', '-m'], capture_output=True, check=True)
-        mem_line = free_output.split('\n')[1] # Mem: line
-        total_ram_mb = int(mem_line.split()[1]) # Total RAM in MB
+        # 'qm config' and 'qm list' are independent; run both commands concurrently while /proc/meminfo is read.
+        # Each runs once per session (qm config is cached for later callers), which matters as every qm call starts Perl.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+            qm_config_future = executor.submit(get_qm_config, pve_cmd, src_id)
+            running_ram_future = executor.submit(fetch_running_vm_ram, pve_cmd)
+            total_ram_mb = get_total_ram_mb()
+            qm_config = qm_config_future.result()
+            structured_running_ram_mb, qm_list_output_str = running_ram_future.result()
 
         src_vm_ram_mb = 512 # Default fallback
-        qm_config_output = run_command([pve_cmd, 'config', src_id], capture_output=True, suppress_stderr=True, check=True)
-        
-        raw_memory_val = None
-        raw_balloon_val = None
-        raw_minimum_val = None
-
-        match_mem_conf = re.search(r'^memory:\s*(\S+)', qm_config_output, re.MULTILINE | re.IGNORECASE)
-        if match_mem_conf: raw_memory_val = match_mem_conf.group(1)
-
-        match_balloon_conf = re.search(r'^balloon:\s*(\S+)', qm_config_output, re.MULTILINE | re.IGNORECASE)
-        if match_balloon_conf: raw_balloon_val = match_balloon_conf.group(1)
-        
-        match_minimum_conf = re.search(r'^minimum:\s*(\S+)', qm_config_output, re.MULTILINE | re.IGNORECASE)
-        if match_minimum_conf: raw_minimum_val = match_minimum_conf.group(1)
+        raw_memory_val = qm_config.get('memory')
+        raw_balloon_val = qm_config.get('balloon')
+        raw_minimum_val = qm_config.get('minimum')
 
         parsed_config_memory_mb = 0
         if raw_memory_val: parsed_config_memory_mb = parse_size_to_mb(raw_memory_val)
@@ -1722,98 +2628,107 @@ def perform_ram_check(pve_cmd, src_id):
             src_vm_ram_mb = 512
             print_warning(f"    VM {src_id} RAM calculation resulted in <=0MB. Corrected to fallback {src_vm_ram_mb} MB for check.")
 
-        qm_list_output_str = run_command([pve_cmd, 'list', '--full'], capture_output=True, suppress_stderr=True, check=True)
-        
-        lines = qm_list_output_str.strip().split('\n')
-        if not lines:
-            print_warning("`qm list --full` returned no output. Skipping running VMs RAM summation.")
-            sum_running_ram_mb = 0 
-        else:
-            # Apply .strip() to the header line string *before* splitting
-            header_line_processed = lines[0].strip()
-            headers_raw = [h.strip() for h in re.split(r'\s{2,}', header_line_processed)] 
-            headers = [h.lower() for h in headers_raw] 
+        # Structured output first; the column based text parser is only needed on PVE
+        # versions where 'qm list' does not accept --output-format
+        sum_running_ram_mb = structured_running_ram_mb
+        if sum_running_ram_mb is None:
+            lines = qm_list_output_str.strip().split('\n')
+            if not lines:
+                print_warning("`qm list --full` returned no output. Skipping running VMs RAM summation.")
+                sum_running_ram_mb = 0 
+            else:
+                # Apply .strip() to the header line string *before* splitting
+                header_line_processed = lines[0].strip()
+                # The separator pattern consumes all surrounding whitespace, so the parts need no further strip()
+                headers_raw = QM_LIST_COLUMN_SPLIT_REGEX.split(header_line_processed)
+                headers = [h.lower() for h in headers_raw] 
             
-            vmid_idx = -1; mem_idx = -1; status_idx = -1;
-            try: vmid_idx = headers.index('vmid')
-            except ValueError:
-                if headers and ("vmid" in headers[0].lower() or headers[0].strip() == "" or (len(headers_raw) > 0 and headers_raw[0].strip().isdigit())):
-                    vmid_idx = 0 
-                else: print_warning("    Could not reliably determine VMID column from 'qm list --full'. VM names in warnings might be 'UNKNOWN_VM'.")
-
-            possible_mem_col_names = ['maxmem', 'mem(mb)', 'memory(mb)', 'mem', 'memory']
-            for col_name_to_find in possible_mem_col_names:
-                try: mem_idx = headers.index(col_name_to_find); break
-                except ValueError: continue
+                vmid_idx = -1; mem_idx = -1; status_idx = -1;
+                try: vmid_idx = headers.index('vmid')
+                except ValueError:
+                    if headers and ("vmid" in headers[0].lower() or headers[0].strip() == "" or (len(headers_raw) > 0 and headers_raw[0].strip().isdigit())):
+                        vmid_idx = 0 
+                    else: print_warning("    Could not reliably determine VMID column from 'qm list --full'. VM names in warnings might be 'UNKNOWN_VM'.")
+
+                possible_mem_col_names = ['maxmem', 'mem(mb)', 'memory(mb)', 'mem', 'memory']
+                for col_name_to_find in possible_mem_col_names:
+                    try: mem_idx = headers.index(col_name_to_find); break
+                    except ValueError: continue
             
-            possible_status_col_names = ['status', 'state']
-            for col_name_to_find in possible_status_col_names:
-                try: status_idx = headers.index(col_name_to_find); break
-                except ValueError: continue
-
-            sum_running_ram_mb = 0
-            if mem_idx == -1 or status_idx == -1:
-                print_warning("Could not determine memory or status column in `qm list --full`. RAM check for running VMs will be skipped or inaccurate.")
-                print_warning(f"    Detected headers (raw): {headers_raw}")
-                sum_running_ram_mb = -1 
-            else:
-                found_running_vms = False
-                for line_str_from_cmd in lines[1:]:
-                    # Apply .strip() to the data line string *before* splitting
-                    line_str_processed = line_str_from_cmd.strip()
-                    parts_raw = [p.strip() for p in re.split(r'\s{2,}', line_str_processed)]
-                    
-                    if len(parts_raw) != len(headers_raw):
-                        print_warning(f"    Skipping VM line due to column count mismatch (expected {len(headers_raw)}, got {len(parts_raw)}): \"{line_str_from_cmd[:70]}...\"")
-                        continue
-                    
-                    # Ensure indices are within bounds for this specific parts_raw list
+                possible_status_col_names = ['status', 'state']
+                for col_name_to_find in possible_status_col_names:
+                    try: status_idx = headers.index(col_name_to_find); break
+                    except ValueError: continue
+
+                sum_running_ram_mb = 0
+                if mem_idx == -1 or status_idx == -1:
+                    print_warning("Could not determine memory or status column in `qm list --full`. RAM check for running VMs will be skipped or inaccurate.")
+                    print_warning(f"    Detected headers (raw): {headers_raw}")
+                    sum_running_ram_mb = -1 
+                else:
+                    found_running_vms = False
+                    # Per-table invariants, computed once instead of for every VM line
+                    # Ensure indices are within bounds for each parts_raw list
                     # This check is mostly redundant if len(parts_raw) == len(headers_raw) and indices were found in headers_raw
                     # but good for safety if an index was, e.g., the last possible one.
-                    max_req_idx = 0
-                    if vmid_idx != -1: max_req_idx = max(max_req_idx, vmid_idx)
-                    if mem_idx != -1: max_req_idx = max(max_req_idx, mem_idx)
-                    if status_idx != -1: max_req_idx = max(max_req_idx, status_idx)
-                    if len(parts_raw) <= max_req_idx:
-                        print_warning(f"    Skipping VM line due to insufficient parts for required columns: \"{line_str_from_cmd[:70]}...\"")
-                        continue
-
-                    current_vm_status = parts_raw[status_idx].lower()
-                    if current_vm_status == 'running':
-                        found_running_vms = True
-                        current_vmid_str = parts_raw[vmid_idx] if vmid_idx != -1 else "UNKNOWN_VM"
-                        try:
-                            mem_value_str = parts_raw[mem_idx]
-                            if mem_value_str.isdigit():
-                                ram_val = int(mem_value_str)
-                                current_vm_ram_mb_val = 0
-                                # Check original header name (headers_raw[mem_idx]) for 'mb' unit hint
-                                if mem_idx < len(headers_raw) and 'mb' in headers_raw[mem_idx].lower():
-                                    current_vm_ram_mb_val = ram_val 
-                                else: 
-                                    current_vm_ram_mb_val = ram_val // (1024 * 1024) if ram_val > 0 else 0
-                                sum_running_ram_mb += current_vm_ram_mb_val
-                            else:
-                                print_warning(f"Could not parse memory '{mem_value_str}' as integer for running VM {current_vmid_str}. Estimating 512MB.")
+                    max_req_idx = max(vmid_idx, mem_idx, status_idx, 0)
+                    # Check original header name (headers_raw[mem_idx]) for 'mb' unit hint
+                    mem_is_mb = 'mb' in headers_raw[mem_idx].lower()
+                    for line_str_from_cmd in itertools.islice(lines, 1, None): # Data lines, without copying the list
+                        # Cheap substring pre-filter: only lines of running VMs are split (qm prints the status lowercase)
+                        if 'running' not in line_str_from_cmd:
+                            continue
+                        # Apply .strip() to the data line string *before* splitting
+                        line_str_processed = line_str_from_cmd.strip()
+                        parts_raw = QM_LIST_COLUMN_SPLIT_REGEX.split(line_str_processed)
+                    
+                        if len(parts_raw) != len(headers_raw):
+                            print_warning(f"    Skipping VM line due to column count mismatch (expected {len(headers_raw)}, got {len(parts_raw)}): \"{line_str_from_cmd[:70]}...\"")
+                            continue
+                    
+                        if len(parts_raw) <= max_req_idx:
+                            print_warning(f"    Skipping VM line due to insufficient parts for required columns: \"{line_str_from_cmd[:70]}...\"")
+                            continue
+
+                        current_vm_status = parts_raw[status_idx].lower()
+                        if current_vm_status == 'running':
+                            found_running_vms = True
+                            current_vmid_str = parts_raw[vmid_idx] if vmid_idx != -1 else "UNKNOWN_VM"
+                            try:
+                                mem_value_str = parts_raw[mem_idx]
+                                if mem_value_str.isdigit():
+                                    ram_val = int(mem_value_str)
+                                    current_vm_ram_mb_val = 0
+                                    if mem_is_mb:
+                                        current_vm_ram_mb_val = ram_val 
+                                    else: 
+                                        current_vm_ram_mb_val = ram_val >> MB_SHIFT if ram_val > 0 else 0
+                                    sum_running_ram_mb += current_vm_ram_mb_val
+                                else:
+                                    print_warning(f"Could not parse memory '{mem_value_str}' as integer for running VM {current_vmid_str}. Estimating 512MB.")
+                                    sum_running_ram_mb += 512 
+                            except (ValueError, IndexError) as e_parse:
+                                print_warning(f"Could not parse memory for running VM {current_vmid_str} from 'qm list --full' (Line: \"{line_str_from_cmd[:70]}...\"). Error: {e_parse}. Estimating 512MB.")
                                 sum_running_ram_mb += 512 
-                        except (ValueError, IndexError) as e_parse:
-                            print_warning(f"Could not parse memory for running VM {current_vmid_str} from 'qm list --full' (Line: \"{line_str_from_cmd[:70]}...\"). Error: {e_parse}. Estimating 512MB.")
-                            sum_running_ram_mb += 512 
-                if not found_running_vms and sum_running_ram_mb != -1: 
-                    print_info("    No VMs currently reported as 'running'.")
-
-        threshold_mb = math.floor(total_ram_mb * RAM_THRESHOLD_PERCENT / 100)
-        print(f"    Total host RAM:      {color_text(format_bytes(total_ram_mb*1024*1024), 'BLUE')}")
+                    if not found_running_vms and sum_running_ram_mb != -1: 
+                        print_info("    No VMs currently reported as 'running'.")
+
+        threshold_mb = total_ram_mb * RAM_THRESHOLD_PERCENT // 100
+        blue, nc = COLORS['BLUE'], COLORS['NC']
+        print(f"    Total host RAM:      {blue}{format_bytes(total_ram_mb << MB_SHIFT)}{nc}")
         
         if sum_running_ram_mb >= 0 : 
-            print(f"    RAM running VMs (sum):{color_text(format_bytes(sum_running_ram_mb*1024*1024), 'BLUE')}")
-            print(f"    Source VM RAM (Est.):{color_text(format_bytes(src_vm_ram_mb*1024*1024), 'BLUE')}")
             prognostic_ram_mb = sum_running_ram_mb + src_vm_ram_mb
-            print(f"    Projected Total RAM: {color_text(format_bytes(prognostic_ram_mb*1024*1024), 'BLUE')} (if clone starts)")
-            print(f"    {RAM_THRESHOLD_PERCENT}% Threshold:        {color_text(format_bytes(threshold_mb*1024*1024), 'BLUE')}")
+            # Formatted once, used in both the summary and the warning
+            projected_str = format_bytes(prognostic_ram_mb << MB_SHIFT)
+            threshold_str = format_bytes(threshold_mb << MB_SHIFT)
+            print(f"    RAM running VMs (sum):{blue}{format_bytes(sum_running_ram_mb << MB_SHIFT)}{nc}")
+            print(f"    Source VM RAM (Est.):{blue}{format_bytes(src_vm_ram_mb << MB_SHIFT)}{nc}")
+            print(f"    Projected Total RAM: {blue}{projected_str}{nc} (if clone starts)")
+            print(f"    {RAM_THRESHOLD_PERCENT}% Threshold:        {blue}{threshold_str}{nc}")
 
             if prognostic_ram_mb > threshold_mb:
-                print_warning(f"\nWARNING: Starting the clone might exceed the {RAM_THRESHOLD_PERCENT}% host RAM usage threshold!")
+                print_warning(f"\nWARNING: Starting the clone might exceed the {RAM_THRESHOLD_PERCENT}% host RAM usage threshold! ({projected_str} > {threshold_str})")
                 try:
                     confirm = input(f"{color_text('Continue anyway (y/N)? ', 'RED')}{COLORS['NC']}").strip().lower()
                     if confirm not in ['y', 'yes']:
@@ -1834,9 +2749,9 @@ def perform_ram_check(pve_cmd, src_id):
 
 # --- Main Execution ---
 
-def main():
-    compress_options = list(COMPRESSION_TOOLS.keys())
-    examples = f"""
+def build_examples():
+    """Returns the examples epilog. Only built when help output is actually formatted (see ExamplesHelpParser)."""
+    return f"""
 Examples:
 
   {color_text('List available VMs/LXCs:', 'YELLOW')}
@@ -1848,7 +2763,7 @@ Examples:
   {color_text('Clone LXC 105, prompt for base new ID (full clone, specify target storage/pool):', 'YELLOW')}
     sudo {sys.argv[0]} clone 105 --clone-mode full --target-pve-storage tankpve --target-zfs-pool-path tankpve/data
 
-  {color_text('Export VM 101 to /mnt/backup/export (uncompressed, prompts for snapshot(s)):', 'YELLOW')}
+  {color_text('Export VM 101 to /mnt/backup/export (zstd compressed by default, prompts for snapshot(s)):', 'YELLOW')}
     sudo {sys.argv[0]} export 101 /mnt/backup/export
 
   {color_text('Export LXC 105 to /mnt/backup/export (using zstd, specify source storage/pool):', 'YELLOW')}
@@ -1862,20 +2777,9 @@ Configuration Note:
   - Target PVE storage name for clone/restore defaults to: {color_text(DEFAULT_PVE_STORAGE, 'BLUE')}
   (These can be overridden using --target-zfs-pool-path and --target-pve-storage options.)
 """
-    parser = argparse.ArgumentParser(
-        description="Proxmox VM/LXC Clone, Export, or Restore script using ZFS snapshots with multi-select and optional compression.",
-        formatter_class=argparse.RawTextHelpFormatter,
-        epilog=examples
-    )
-
-    parser.add_argument('--list', action='store_true', help="List available VMs and LXC containers and exit.")
-    parser.add_argument('--target-zfs-pool-path', default=DEFAULT_ZFS_POOL_PATH,
-                        help=f"Base path for target ZFS datasets (clone/restore). Default: {DEFAULT_ZFS_POOL_PATH}")
-    parser.add_argument('--target-pve-storage', default=DEFAULT_PVE_STORAGE,
-                        help=f"PVE storage name for target datasets (clone/restore). Default: {DEFAULT_PVE_STORAGE}")
-
-    subparsers = parser.add_subparsers(dest='mode', help='Operation mode (clone, export, restore)', required=False)
 
+def add_clone_parser(subparsers):
+    """Adds the 'clone' mode arguments."""
     parser_clone = subparsers.add_parser('clone', help='Clone a VM/LXC from one or more ZFS snapshots.', formatter_class=argparse.RawTextHelpFormatter)
     parser_clone.add_argument('source_id', help="ID of the source VM or LXC to clone.")
     parser_clone.add_argument('new_id', nargs='?', default=None,
@@ -1883,45 +2787,127 @@ Configuration Note:
     parser_clone.add_argument('--clone-mode', choices=['linked', 'full'], default='linked',
                               help="Type of ZFS clone ('linked' uses 'zfs clone', 'full' uses send/receive). Default: linked")
 
+def add_export_parser(subparsers):
+    """Adds the 'export' mode arguments."""
+    compress_options = list(COMPRESSION_TOOLS.keys())
     parser_export = subparsers.add_parser('export', help='Export a VM/LXC config and ZFS snapshot data for one or more snapshots (optionally compressed).', formatter_class=argparse.RawTextHelpFormatter)
     parser_export.add_argument('source_id', help="ID of the source VM or LXC to export.")
     parser_export.add_argument('export_dir',
                                help="Parent directory where export subdirectories (named after source_id_snapshot_suffix) will be created (e.g., /mnt/backups).")
-    parser_export.add_argument('--compress', choices=compress_options, default='none',
-                               help=f"Compression method for ZFS streams. Default: none. Options: {', '.join(compress_options)}")
+    parser_export.add_argument('--compress', choices=compress_options, default=None,
+                               help=f"Compression method for ZFS streams. Default: {DEFAULT_COMPRESSION_METHOD} (multi-threaded; {DEFAULT_COMPRESSION_FALLBACK} if {DEFAULT_COMPRESSION_METHOD} is not installed). Options: {', '.join(compress_options)}")
+    parser_export.add_argument('--compression-threads', type=int, default=None, metavar='N',
+                               help="Number of compressor threads (pigz '-p N', zstd '-T N'). Default: all cores. Ignored for single-threaded gzip.")
+    parser_export.add_argument('--zstd-level', type=int, default=DEFAULT_ZSTD_LEVEL, metavar='LEVEL',
+                               help=f"zstd compression level 1-19, negative for '--fast' levels (e.g. -1 for poorly compressible data). Default: {DEFAULT_ZSTD_LEVEL}\nzstd exports also use '--long={ZSTD_LONG_WINDOW_LOG}' if the installed zstd supports it.")
+    parser_export.add_argument('--send-raw', action='store_true',
+                               help="Use raw 'zfs send -w' (encrypted datasets are exported still encrypted; restore requires the key to be loaded later).")
+    parser_export.add_argument('--plain-send', action='store_true',
+                               help=f"Do not pass {' '.join(DEFAULT_ZFS_SEND_FLAGS)} to 'zfs send' (for receivers without large-block/compressed stream support).")
+    parser_export.add_argument('--local-clone', action='store_true',
+                               help="Instead of writing data streams, create a ZFS clone of each snapshot in the source pool (O(1), copy-on-write).\nThe export directory only holds config and metadata; restore renames the clone into place (one-time, same pool only).")
+    parser_export.add_argument('--local-clone-path', default=None,
+                               help="Parent dataset for --local-clone clones (must be in the source pool). Default: --source-zfs-pool-path")
+    parser_export.add_argument('--pretty-meta', action='store_true',
+                               help=f"Write the {DEFAULT_EXPORT_META_SUFFIX} metadata file indented for human reading (default: compact JSON).")
     parser_export.add_argument('--source-zfs-pool-path', default=DEFAULT_ZFS_POOL_PATH,
                                help=f"Base path where source ZFS datasets reside. Default: {DEFAULT_ZFS_POOL_PATH}")
     parser_export.add_argument('--source-pve-storage', default=DEFAULT_PVE_STORAGE,
                                help=f"PVE storage name linked in the source config. Default: {DEFAULT_PVE_STORAGE}")
 
-
+def add_restore_parser(subparsers):
+    """Adds the 'restore' mode arguments."""
     parser_restore = subparsers.add_parser('restore', help='Restore a VM/LXC from a specific exported directory (auto-detects compression).', formatter_class=argparse.RawTextHelpFormatter)
     parser_restore.add_argument('import_dir',
                                 help="Path to the specific export directory containing the .conf, .meta.json, and data stream files (e.g., /mnt/backups/101_snapshot_suffix).")
     parser_restore.add_argument('new_id', nargs='?', default=None,
                                 help="ID for the new restored instance. (Default: 8<original_id>, will prompt if omitted).")
+    parser_restore.add_argument('--no-verify', action='store_true',
+                                help="Skip SHA-256 verification of the stream files against the checksums recorded at export.")
+
+class ExamplesHelpParser(argparse.ArgumentParser):
+    """Top-level parser that builds the examples epilog only when help text is actually formatted."""
+    def format_help(self):
+        if self.epilog is None:
+            self.epilog = build_examples()
+        return super().format_help()
+
+MODE_PARSER_BUILDERS = {
+    'clone': add_clone_parser,
+    'export': add_export_parser,
+    'restore': add_restore_parser,
+}
+
+def build_arg_parser(argv):
+    """
+    Builds the argument parser for the given command line.
+    Only the subparsers of modes named on the command line are constructed ('--list' needs none);
+    help output and command lines without a mode get all of them so usage and errors stay complete.
+    """
+    help_requested = '-h' in argv or '--help' in argv
+    parser = ExamplesHelpParser(
+        description="Proxmox VM/LXC Clone, Export, or Restore script using ZFS snapshots with multi-select and optional compression.",
+        formatter_class=argparse.RawTextHelpFormatter
+    )
+
+    parser.add_argument('--list', action='store_true', help="List available VMs and LXC containers and exit.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Print the full command line of each data pipeline before running it.")
+    parser.add_argument('--no-pv', action='store_true',
+                        help=f"Don't put 'pv' into data pipelines; print a plain progress line every {PROGRESS_REPORT_INTERVAL}s instead.\n'pv' is also skipped automatically when stderr is not a terminal (cron, logs).")
+    parser.add_argument('--mbuffer-size', default=DEFAULT_MBUFFER_SIZE, metavar='SIZE',
+                        help=f"Memory of the mbuffer step placed next to 'zfs send'/'zfs receive' in data pipelines (per stream, e.g. 512M, 2G; 0 disables).\nOnly used if mbuffer is installed. Default: {DEFAULT_MBUFFER_SIZE}")
+    parser.add_argument('--target-zfs-pool-path', default=DEFAULT_ZFS_POOL_PATH,
+                        help=f"Base path for target ZFS datasets (clone/restore). Default: {DEFAULT_ZFS_POOL_PATH}")
+    parser.add_argument('--target-pve-storage', default=DEFAULT_PVE_STORAGE,
+                        help=f"PVE storage name for target datasets (clone/restore). Default: {DEFAULT_PVE_STORAGE}")
+
+    # Mode parsers are plain ArgumentParsers (no examples epilog in 'clone -h' etc.)
+    subparsers = parser.add_subparsers(dest='mode', help='Operation mode (clone, export, restore)', required=False, parser_class=argparse.ArgumentParser)
 
+    requested_modes = [mode for mode in MODE_PARSER_BUILDERS if mode in argv]
+    if help_requested or (not requested_modes and '--list' not in argv):
+        requested_modes = list(MODE_PARSER_BUILDERS)
+    for mode in requested_modes:
+        MODE_PARSER_BUILDERS[mode](subparsers)
+    return parser
+
+
+def run_list_mode(is_root):
+    """Lists VMs/LXCs and exits with 0 on success, 1 otherwise."""
+    if not is_root:
+        print_warning("Root privileges might be needed to read all config files for listing.")
+    if list_instances():
+        sys.exit(0)
+    else:
+        sys.exit(1)
+
+def main():
+    is_root = os.geteuid() == 0
+    # Plain '--list' needs no argument parser at all
+    if sys.argv[1:] == ['--list']:
+        run_list_mode(is_root)
+
+    parser = build_arg_parser(sys.argv[1:])
     args = parser.parse_args()
 
     if args.list:
-        if os.geteuid() != 0:
-            print_warning("Root privileges might be needed to read all config files for listing.")
-        if list_instances():
-            sys.exit(0)
-        else:
-            sys.exit(1)
+        run_list_mode(is_root)
 
     if not args.mode:
         parser.print_help()
         print_error("\nError: You must specify an operation mode (clone, export, restore) if not using --list.", exit_code=1)
 
-    if os.geteuid() != 0:
+    if not is_root:
         print_warning("Warning: Root privileges (sudo) are likely required for ZFS/Proxmox commands.")
 
-    if not is_tool('pv'):
-        print_warning("Tool 'pv' (Pipe Viewer) not found. Operations involving data streams will not show progress bars.")
+    if args.no_pv or not sys.stderr.isatty():
+        print_info("Progress bars disabled ('--no-pv' or no terminal); data streams report plain progress lines.")
+    elif not is_tool('pv'):
+        print_warning("Tool 'pv' (Pipe Viewer) not found. Data streams will report plain progress lines instead of progress bars.")
     else:
         print_info("Tool 'pv' found, will be used for progress display.")
+    if args.mbuffer_size != "0" and not is_tool('mbuffer'):
+        print_info("Tool 'mbuffer' not found. Install it to buffer ZFS streams between send/receive and the other pipeline steps.")
 
 
     if args.mode == 'clone':